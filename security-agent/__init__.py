@@ -4,12 +4,7 @@ AI-powered code security scanner and autonomous fixer
 The engineer that lives inside your code.
 """
 
-from scanner import SecurityScanner, scan_repository
-from ai_fixer import AIFixer
-from patcher import SecurityPatcher, apply_security_fixes
-import language_detector
-import pattern_detector
-import security_policies
+import importlib
 
 __version__ = '1.0.0'
 
@@ -23,3 +18,32 @@ __all__ = [
     'pattern_detector',
     'security_policies',
 ]
+
+# Exported name -> (module, attribute); attribute None exports the module.
+# Resolved on first access so importing the package stays cheap.
+_LAZY_EXPORTS = {
+    'SecurityScanner': ('scanner', 'SecurityScanner'),
+    'scan_repository': ('scanner', 'scan_repository'),
+    'AIFixer': ('ai_fixer', 'AIFixer'),
+    'SecurityPatcher': ('patcher', 'SecurityPatcher'),
+    'apply_security_fixes': ('patcher', 'apply_security_fixes'),
+    'language_detector': ('language_detector', None),
+    'pattern_detector': ('pattern_detector', None),
+    'security_policies': ('security_policies', None),
+}
+
+
+def __getattr__(name):
+    try:
+        module_name, attr = _LAZY_EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    module = importlib.import_module(module_name)
+    value = module if attr is None else getattr(module, attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
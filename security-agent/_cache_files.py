@@ -0,0 +1,57 @@
+"""
+Cache Files
+Housekeeping for the entries kept under CACHE_CONFIG['cache_dir']
+"""
+
+import os
+import time
+from typing import Set
+
+# Directories already pruned by this process
+_pruned: Set[str] = set()
+
+
+def prune_cache_dir(cache_dir: str, max_age_seconds: float, max_entries: int) -> int:
+    """
+    Delete expired cache entries, and the oldest ones beyond a count limit
+
+    Each directory is pruned at most once per process, so writers can call
+    this after every store without rescanning the directory each time.
+    Leftover temp files from interrupted writes are removed the same way.
+
+    Args:
+        cache_dir: Directory holding one file per cache entry
+        max_age_seconds: Entries last written longer ago than this are removed
+        max_entries: Number of most recent entries kept
+
+    Returns:
+        Number of files removed
+    """
+    if cache_dir in _pruned:
+        return 0
+    _pruned.add(cache_dir)
+
+    entries = []
+    try:
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(('.json', '.tmp')) and entry.is_file():
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass
+    except OSError:
+        return 0
+
+    # Newest first: everything past max_entries or max_age_seconds goes
+    entries.sort(reverse=True)
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for index, (mtime, path) in enumerate(entries):
+        if index >= max_entries or mtime < cutoff:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
@@ -0,0 +1,192 @@
+"""
+Language Tables
+Shared, read-only file classification tables for the security agent
+"""
+
+import os
+import subprocess
+from types import MappingProxyType
+from typing import Callable, FrozenSet, Iterator, List, Optional, Tuple
+from config import FILE_CONFIG, SCAN_CONFIG
+
+# File extension to language mapping
+EXT_MAP = MappingProxyType({
+    '.py': 'python',
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.java': 'java',
+    '.c': 'c',
+    '.h': 'c',
+    '.cpp': 'cpp',
+    '.cc': 'cpp',
+    '.cxx': 'cpp',
+    '.hpp': 'cpp',
+    '.cs': 'csharp',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.rb': 'ruby',
+    '.php': 'php',
+    '.swift': 'swift',
+    '.kt': 'kotlin',
+    '.scala': 'scala',
+})
+
+# Suffixes worth an EXT_MAP lookup, for a single str.endswith() pre-check
+# on the lower-cased name (EXT_MAP keys are lower case)
+EXT_SUFFIXES = tuple(EXT_MAP)
+
+EXCLUDED_DIRS = frozenset(FILE_CONFIG['excluded_dirs'])
+EXCLUDED_FILES = frozenset(FILE_CONFIG['excluded_files'])
+EXCLUDED_SUFFIXES = tuple(FILE_CONFIG['excluded_suffixes'])
+
+
+def resolve_language(path: str) -> Optional[str]:
+    """
+    Resolve a file's language from its extension
+
+    Args:
+        path: File path or name
+
+    Returns:
+        Language name, or None if the extension is not mapped
+    """
+    return EXT_MAP.get(os.path.splitext(path)[1].lower())
+
+
+def iter_candidate_files(repo_path: str,
+                         name_filter: Optional[Callable[[str], bool]] = None,
+                         oversized: Optional[List[str]] = None) -> Iterator[os.DirEntry]:
+    """
+    Walk a repository, yielding the files worth looking at
+
+    Uses os.scandir so directory entries are typed without an extra stat,
+    and drops excluded and oversized files before anything opens them.
+    Order and symlink handling follow os.walk (top-down; symlinked files
+    are listed, symlinked directories are not descended).
+
+    Args:
+        repo_path: Path to repository
+        name_filter: If given, only file names it accepts are stat'ed and yielded
+        oversized: If given, filled with the paths of files dropped for
+            exceeding FILE_CONFIG['max_file_size']
+
+    Yields:
+        DirEntry for each file; its stat() result is already cached
+    """
+    max_file_size = FILE_CONFIG['max_file_size']
+    stack = [repo_path]
+
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+
+        subdirs = []
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if entry.name not in EXCLUDED_DIRS and not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    else:
+                        # Lockfiles, minified bundles and similar are never worth reading
+                        if entry.name in EXCLUDED_FILES or entry.name.endswith(EXCLUDED_SUFFIXES):
+                            continue
+                        if name_filter is not None and not name_filter(entry.name):
+                            continue
+                        if entry.stat().st_size > max_file_size:
+                            if oversized is not None:
+                                oversized.append(entry.path)
+                            continue
+                        yield entry
+                except OSError:
+                    continue
+
+        # Reversed so the first subdirectory is popped (and walked) first
+        stack.extend(reversed(subdirs))
+
+
+def git_unignored_files(repo_path: str) -> Optional[FrozenSet[str]]:
+    """
+    List the files of a checkout that git does not ignore, via one `git ls-files` call
+
+    That is every tracked file plus untracked files no .gitignore rule
+    (or .git/info/exclude, core.excludesFile) matches.
+
+    Args:
+        repo_path: Path to repository
+
+    Returns:
+        Paths relative to repo_path (os.sep separated), or None if repo_path
+        is not the top of a git work tree or git could not be run
+    """
+    if not os.path.exists(os.path.join(repo_path, '.git')):
+        return None
+    try:
+        result = subprocess.run(
+            ['git', '-C', repo_path, 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+            capture_output=True, check=True, timeout=SCAN_CONFIG['timeout']
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    paths = os.fsdecode(result.stdout).split('\0')
+    if os.sep != '/':
+        paths = [path.replace('/', os.sep) for path in paths]
+    return frozenset(path for path in paths if path)
+
+
+def git_worktree_changes(repo_path: str) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+    """
+    Describe how a checkout differs from its HEAD commit, via one `git status` call
+
+    git answers from the index's cached stat data, so a clean work tree is
+    described without reading or stat'ing every file from Python.
+
+    Args:
+        repo_path: Path to repository
+
+    Returns:
+        (HEAD commit id, [(status code, path)] for every changed or untracked,
+        non-ignored file, paths relative to repo_path and os.sep separated),
+        or None if repo_path is not the top of a git work tree or git could
+        not be run
+    """
+    if not os.path.exists(os.path.join(repo_path, '.git')):
+        return None
+    try:
+        result = subprocess.run(
+            ['git', '--no-optional-locks', '-C', repo_path, 'status',
+             '--porcelain=v2', '--branch', '--untracked-files=all', '-z'],
+            capture_output=True, check=True, timeout=SCAN_CONFIG['timeout']
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    head = ''
+    changes = []
+    records = iter(os.fsdecode(result.stdout).split('\0'))
+    for record in records:
+        kind = record[:1]
+        if record.startswith('# branch.oid '):
+            head = record[len('# branch.oid '):]
+        elif kind == '1':
+            fields = record.split(' ', 8)
+            changes.append((fields[1], fields[8]))
+        elif kind == '2':
+            fields = record.split(' ', 9)
+            changes.append((fields[1], fields[9]))
+            next(records, None)  # the rename's original path
+        elif kind == 'u':
+            fields = record.split(' ', 10)
+            changes.append((fields[1], fields[10]))
+        elif kind == '?':
+            changes.append(('??', record[2:]))
+
+    if os.sep != '/':
+        changes = [(code, path.replace('/', os.sep)) for code, path in changes]
+    return head, changes
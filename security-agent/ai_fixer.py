@@ -4,149 +4,590 @@ Generates secure code solutions for security vulnerabilities
 """
 
 import os
+import sys
 import re
 import json
-from typing import Dict, Any, Optional, List
-
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
-
-from config import GEMINI_API_KEY, GEMINI_MODEL_NAME
+import time
+import hashlib
+import tempfile
+import asyncio
+import functools
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, Iterator
+
+from config import get_gemini_api_key, get_gemini_model_name, CACHE_CONFIG, SCAN_CONFIG
+from _lang_tables import resolve_language
+from findings import Finding, FindingInput
+from _cache_files import prune_cache_dir
+
+# Retry policy for rate-limited (HTTP 429) Gemini requests
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+
+# Findings sent per concurrent round (and per checkpoint) in batch generation
+BATCH_CHUNK_SIZE = 50
+
+# Gemini batch API: below this many findings job overhead outweighs the savings
+BATCH_API_MIN_FINDINGS = 10
+BATCH_POLL_INTERVAL_SECONDS = 30
+# Longest wait for a batch job before it is cancelled in favour of the
+# concurrent path
+BATCH_MAX_WAIT_SECONDS = SCAN_CONFIG['timeout']
+BATCH_TERMINAL_STATES = {
+    'JOB_STATE_SUCCEEDED',
+    'JOB_STATE_FAILED',
+    'JOB_STATE_CANCELLED',
+    'JOB_STATE_EXPIRED',
+}
+
+
+# Fix cache: identical (issue, language, code) findings reuse a stored response
+FIX_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Fenced code block without a language tag
+_GENERIC_BLOCK_RX = re.compile(r'```\n?(.*?)```', re.DOTALL)
+
+# Section following the "### Fixed Code" header, up to the next header
+_FIXED_CODE_RX = re.compile(r'### Fixed Code(.*?)(?:###|\Z)', re.DOTALL)
+
+
+@functools.lru_cache(maxsize=None)
+def _optional_import(module_name: str):
+    """
+    Import an optional SDK on first use
+
+    The Gemini SDKs are slow to import, so they are only loaded when a fixer
+    actually talks to the API.
+
+    Returns:
+        The module, or None if it is not installed
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    """Write JSON via a temp file and os.replace so readers never see a partial file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[AIFixer] Could not write {path}: {e}", file=sys.stderr)
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """Check whether a Gemini error is a 429 / quota exhaustion"""
+    if getattr(error, 'code', None) == 429:
+        return True
+    return type(error).__name__ == 'ResourceExhausted' or '429' in str(error)
+
+
+class _LoopRunner:
+    """Run coroutines to completion on one private event loop, until closed"""
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        # A caller already inside an event loop can't block on another loop
+        # in the same thread, so the private loop then gets its own thread
+        try:
+            asyncio.get_running_loop()
+            self._thread = ThreadPoolExecutor(max_workers=1)
+        except RuntimeError:
+            self._thread = None
+
+    def run(self, coro):
+        """Run a coroutine on the private loop and return its result"""
+        if self._thread is None:
+            return self._loop.run_until_complete(coro)
+        return self._thread.submit(self._loop.run_until_complete, coro).result()
+
+    def close(self) -> None:
+        """Shut down the loop (and its thread, if any)"""
+        try:
+            self.run(self._loop.shutdown_asyncgens())
+        finally:
+            if self._thread is not None:
+                self._thread.shutdown()
+            self._loop.close()
 
 
 class AIFixer:
     """AI-powered security code fixer using Google Gemini"""
 
-    def __init__(self, api_key: str = None, model_name: str = None):
+    # Compiled fenced-code-block patterns keyed by language tag
+    _CODE_BLOCK_CACHE: Dict[str, re.Pattern] = {}
+
+    def __init__(self, api_key: str = None, model_name: str = None, use_cache: bool = None):
         """
         Initialize the AI Fixer with Google Gemini
 
         Args:
             api_key: Google API key (defaults to env var)
             model_name: Gemini model name (defaults to gemini-2.0-flash)
+            use_cache: Reuse fixes stored by earlier runs
+                (defaults to CACHE_CONFIG['enabled'])
         """
-        self.api_key = api_key or GEMINI_API_KEY
-        self.model_name = model_name or GEMINI_MODEL_NAME
+        self.api_key = api_key or get_gemini_api_key()
+        self.model_name = model_name or get_gemini_model_name()
+        self.use_cache = CACHE_CONFIG['enabled'] if use_cache is None else use_cache
         self.model = None
 
-        if GEMINI_AVAILABLE and self.api_key:
+        genai = _optional_import('google.generativeai') if self.api_key else None
+        if genai is not None:
             try:
                 genai.configure(api_key=self.api_key)
                 self.model = genai.GenerativeModel(self.model_name)
             except Exception as e:
-                print(f"[AIFixer] Failed to initialize Gemini: {e}")
+                print(f"[AIFixer] Failed to initialize Gemini: {e}", file=sys.stderr)
 
     def is_available(self) -> bool:
         """Check if AI fixer is available"""
         return self.model is not None
 
-    def generate_secure_solution(self, issue_data: Dict[str, Any]) -> Dict[str, Any]:
+    def generate_secure_solution(self, issue_data: FindingInput) -> Dict[str, Any]:
         """
         Generate a secure code solution for a security issue
 
         Args:
-            issue_data: Dictionary containing issue information
+            issue_data: Finding, or dictionary containing issue information
 
         Returns:
             Dictionary with the secure solution and metadata
         """
         if not self.is_available():
-            return {
-                'success': False,
-                'error': 'Gemini API not available. Check GEMINI_API_KEY.',
-                'solution_code': '',
-                'explanation': ''
-            }
-
-        # Extract issue information
-        vulnerability_type = issue_data.get('issue', 'Unknown')
-        cwe_id = issue_data.get('cwe', 'Unknown')
-        file_path = issue_data.get('file', 'Unknown')
-        line_number = issue_data.get('line', 0)
-        problematic_code = issue_data.get('code', '')
-        description = issue_data.get('description', '')
-        context = issue_data.get('context', [])
-        language = issue_data.get('language', self._detect_language(file_path))
+            return self._unavailable_solution()
 
-        prompt = self._create_fix_prompt(
-            vulnerability_type=vulnerability_type,
-            cwe_id=cwe_id,
-            language=language,
-            problematic_code=problematic_code,
-            description=description,
-            context=context,
-            line_number=line_number
-        )
+        finding = self._coerce(issue_data)
+        prompt, meta = self._prepare_fix_request(finding)
+
+        cached_text = self._load_cached_fix(finding)
+        if cached_text is not None:
+            return self._build_solution(cached_text, meta)
 
         try:
             response = self.model.generate_content(prompt)
             solution_text = response.text.strip()
+        except Exception as e:
+            return self._failed_solution(e)
 
-            # Extract the solution code from the response
-            solution_code = self._extract_solution_code(solution_text, language)
-
-            return {
-                'success': True,
-                'solution_code': solution_code,
-                'explanation': solution_text,
-                'language': language,
-                'original_code': problematic_code,
-                'line_number': line_number,
-                'file_path': file_path
-            }
+        self._store_cached_fix(finding, solution_text)
+        return self._build_solution(solution_text, meta)
 
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e),
-                'solution_code': '',
-                'explanation': f'Failed to generate solution: {str(e)}'
-            }
-
-    def generate_batch_solutions(self, findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def generate_batch_solutions(self, findings: List[FindingInput],
+                                 chunk_size: int = BATCH_CHUNK_SIZE,
+                                 state_path: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Generate solutions for multiple findings
 
+        Requests are issued concurrently; see agenerate_batch.
+
         Args:
             findings: List of security findings
+            chunk_size: Findings processed per concurrent round
+            state_path: Optional checkpoint file; see iter_batch_solutions
 
         Returns:
             List of solutions
         """
+        if not findings:
+            return []
+        return list(self.iter_batch_solutions(findings, chunk_size, state_path))
+
+    def iter_batch_solutions(self, findings: List[FindingInput],
+                             chunk_size: int = BATCH_CHUNK_SIZE,
+                             state_path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Generate solutions chunk by chunk, yielding each as it completes
+
+        When state_path is given, successful solutions are checkpointed to
+        it after every chunk, and findings already recorded there are
+        yielded from the file instead of being sent again. A run that dies
+        part way can therefore be resumed by calling again with the same
+        state_path.
+
+        Args:
+            findings: List of security findings
+            chunk_size: Findings processed per concurrent round
+            state_path: Optional JSON checkpoint file
+
+        Yields:
+            Solutions, in the same order as findings
+        """
+        done = self._load_batch_state(state_path) if state_path else {}
+        chunk_size = max(1, chunk_size)
+
+        # Every chunk runs on one event loop: the SDK's async client stays
+        # bound to the loop it was first used on
+        runner = _LoopRunner()
+        try:
+            for start in range(0, len(findings), chunk_size):
+                chunk = findings[start:start + chunk_size]
+                keys = [self._state_key(f) for f in chunk]
+                resumed = [key in done for key in keys]
+                pending = [f for f, skip in zip(chunk, resumed) if not skip]
+                fresh = iter(runner.run(self.agenerate_batch(pending)) if pending else ())
+
+                solutions = []
+                for finding, key, skip in zip(chunk, keys, resumed):
+                    if skip:
+                        solution = dict(done[key])
+                        solution['finding_id'] = self._finding_id(finding)
+                    else:
+                        solution = next(fresh)
+                        if state_path and solution.get('success'):
+                            done[key] = solution
+                    solutions.append(solution)
+
+                if state_path and pending:
+                    self._save_batch_state(state_path, done)
+                yield from solutions
+        finally:
+            runner.close()
+
+    async def agenerate_batch(self, findings: List[FindingInput],
+                              max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """
+        Generate solutions for multiple findings concurrently
+
+        Args:
+            findings: List of security findings
+            max_concurrency: Maximum in-flight Gemini requests
+                (defaults to SCAN_CONFIG['max_workers'])
+
+        Returns:
+            List of solutions, in the same order as findings
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or SCAN_CONFIG['max_workers'])
+
+        # Identical snippets (copy-pasted boilerplate, generated code) are
+        # asked about once and the answer is shared by every copy
+        coerced = [self._coerce(f) for f in findings]
+        groups: Dict[Tuple[str, str, str], int] = {}
+        group_of = [
+            groups.setdefault(self._dedup_key(f), len(groups))
+            for f in coerced
+        ]
+        representatives = {}
+        for finding, group in zip(coerced, group_of):
+            representatives.setdefault(group, finding)
+        if len(groups) < len(coerced):
+            print(f"[AIFixer] Deduplicated {len(coerced)} findings into {len(groups)} requests",
+                  file=sys.stderr)
+
+        tasks = [
+            asyncio.create_task(self._agenerate_one(representatives[g], semaphore))
+            for g in range(len(groups))
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
         solutions = []
-        for finding in findings:
-            solution = self.generate_secure_solution(finding)
-            solution['finding_id'] = finding.get('id', id(finding))
+        for original, finding, group in zip(findings, coerced, group_of):
+            solution = results[group]
+            if isinstance(solution, BaseException):
+                solution = self._failed_solution(solution)
+            else:
+                solution = dict(solution)
+                if solution.get('success'):
+                    solution.update(self._solution_meta(finding))
+            solution['finding_id'] = self._finding_id(original)
             solutions.append(solution)
         return solutions
 
-    def explain_vulnerability(self, issue_data: Dict[str, Any]) -> str:
+    def generate_batch_solutions_via_batch_api(self, findings: List[FindingInput]) -> List[Dict[str, Any]]:
+        """
+        Generate solutions for many findings with a single Gemini batch job
+
+        Batch jobs are billed at a discount and are not subject to the
+        concurrent request limits, but take minutes to complete. Small
+        batches, or environments without the google-genai SDK, use the
+        concurrent path instead, as do jobs still running after
+        BATCH_MAX_WAIT_SECONDS (which are cancelled).
+
+        Args:
+            findings: List of security findings
+
+        Returns:
+            List of solutions, in the same order as findings
+        """
+        if not self.is_available():
+            return self.generate_batch_solutions(findings)
+
+        coerced = [self._coerce(f) for f in findings]
+        cached_texts = [self._load_cached_fix(f) for f in coerced]
+        pending = [i for i, text in enumerate(cached_texts) if text is None]
+
+        genai_sdk = None
+        if len(pending) >= BATCH_API_MIN_FINDINGS:
+            genai_sdk = _optional_import('google.genai')
+        if genai_sdk is None:
+            return self.generate_batch_solutions(findings)
+
+        prepared = [self._prepare_fix_request(f) for f in coerced]
+        metas = [meta for _, meta in prepared]
+        requests = [
+            {'contents': [{'role': 'user', 'parts': [{'text': prepared[i][0]}]}]}
+            for i in pending
+        ]
+
+        try:
+            client = genai_sdk.Client(api_key=self.api_key)
+            job = client.batches.create(
+                model=self.model_name,
+                src=requests,
+                config={'display_name': 'bridge-security-fixes'}
+            )
+            deadline = time.monotonic() + BATCH_MAX_WAIT_SECONDS
+            while job.state.name not in BATCH_TERMINAL_STATES:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(min(BATCH_POLL_INTERVAL_SECONDS, remaining))
+                job = client.batches.get(name=job.name)
+        except Exception as e:
+            print(f"[AIFixer] Batch job failed, falling back to concurrent requests: {e}", file=sys.stderr)
+            return self.generate_batch_solutions(findings)
+
+        if job.state.name not in BATCH_TERMINAL_STATES:
+            print(f"[AIFixer] Batch job still {job.state.name} after {BATCH_MAX_WAIT_SECONDS}s, "
+                  "cancelling and falling back to concurrent requests", file=sys.stderr)
+            try:
+                client.batches.cancel(name=job.name)
+            except Exception as e:
+                print(f"[AIFixer] Could not cancel batch job {job.name}: {e}", file=sys.stderr)
+            return self.generate_batch_solutions(findings)
+
+        if job.state.name != 'JOB_STATE_SUCCEEDED':
+            print(f"[AIFixer] Batch job ended in {job.state.name}, falling back to concurrent requests",
+                  file=sys.stderr)
+            return self.generate_batch_solutions(findings)
+
+        # Inlined responses come back in request order
+        errors = {}
+        for i, inlined in zip(pending, job.dest.inlined_responses):
+            if inlined.error or not inlined.response:
+                errors[i] = Exception(inlined.error or 'Empty batch response')
+            else:
+                cached_texts[i] = inlined.response.text.strip()
+                self._store_cached_fix(coerced[i], cached_texts[i])
+
+        solutions = []
+        for i, finding in enumerate(findings):
+            if cached_texts[i] is not None:
+                solution = self._build_solution(cached_texts[i], metas[i])
+            else:
+                solution = self._failed_solution(errors.get(i, Exception('Empty batch response')))
+            solution['finding_id'] = self._finding_id(finding)
+            solutions.append(solution)
+        return solutions
+
+    async def _agenerate_one(self, finding: Finding, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Generate a solution for one finding, backing off on rate limits"""
+        if not self.is_available():
+            return self._unavailable_solution()
+
+        prompt, meta = self._prepare_fix_request(finding)
+
+        cached_text = self._load_cached_fix(finding)
+        if cached_text is not None:
+            return self._build_solution(cached_text, meta)
+
+        async with semaphore:
+            for attempt in range(MAX_RETRIES + 1):
+                try:
+                    response = await self.model.generate_content_async(prompt)
+                    break
+                except Exception as e:
+                    if attempt < MAX_RETRIES and _is_rate_limited(e):
+                        await asyncio.sleep(BACKOFF_BASE_SECONDS * (2 ** attempt))
+                        continue
+                    return self._failed_solution(e)
+
+        solution_text = response.text.strip()
+        self._store_cached_fix(finding, solution_text)
+        return self._build_solution(solution_text, meta)
+
+    def _coerce(self, finding: FindingInput) -> Finding:
+        """Normalize a finding dictionary into a Finding"""
+        if isinstance(finding, Finding):
+            return finding
+        return Finding.from_dict(finding)
+
+    @staticmethod
+    def _finding_id(finding: FindingInput) -> Any:
+        """Get the id echoed back as a solution's finding_id"""
+        if isinstance(finding, Finding):
+            return id(finding)
+        return finding.get('id', id(finding))
+
+    @staticmethod
+    def _state_key(finding: FindingInput) -> str:
+        """Get the key a finding is checkpointed under, stable across runs"""
+        if isinstance(finding, dict) and 'id' in finding:
+            return str(finding['id'])
+        if isinstance(finding, dict):
+            finding = Finding.from_dict(finding)
+        return f"{finding.file}:{finding.line}:{finding.cwe}:{finding.issue}"
+
+    @staticmethod
+    def _load_batch_state(state_path: str) -> Dict[str, Dict[str, Any]]:
+        """Load checkpointed solutions, or nothing if the file is missing or unreadable"""
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return dict(state.get('solutions', {}))
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    @staticmethod
+    def _save_batch_state(state_path: str, solutions: Dict[str, Dict[str, Any]]):
+        """Atomically write checkpointed solutions"""
+        _write_json_atomic(state_path, {'solutions': solutions})
+
+    @staticmethod
+    def _fix_cache_path(finding: Finding) -> str:
+        """Get the fix cache file for a finding's (issue, language, code)"""
+        key = hashlib.blake2b(
+            f'{finding.issue}|{finding.language}|{finding.code}'.encode('utf-8'),
+            digest_size=16
+        ).hexdigest()
+        return os.path.join(CACHE_CONFIG['cache_dir'], 'fixes', f'{key}.json')
+
+    def _load_cached_fix(self, finding: Finding) -> Optional[str]:
+        """Get a stored, unexpired model response for this finding, if any"""
+        if not self.use_cache:
+            return None
+        try:
+            with open(self._fix_cache_path(finding), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if time.time() - entry['created'] < FIX_CACHE_TTL_SECONDS:
+                return entry['response']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _store_cached_fix(self, finding: Finding, response_text: str):
+        """Store a successful model response for reuse by later runs"""
+        if self.use_cache:
+            cache_path = self._fix_cache_path(finding)
+            _write_json_atomic(cache_path, {
+                'created': time.time(),
+                'response': response_text,
+            })
+            # Entries past their TTL are never read again
+            prune_cache_dir(os.path.dirname(cache_path), FIX_CACHE_TTL_SECONDS,
+                            CACHE_CONFIG['max_entries'])
+
+    @staticmethod
+    def clear_cache() -> int:
+        """
+        Delete every stored fix response
+
+        Returns:
+            Number of cache entries removed
+        """
+        cache_dir = os.path.join(CACHE_CONFIG['cache_dir'], 'fixes')
+        removed = 0
+        try:
+            names = os.listdir(cache_dir)
+        except OSError:
+            return 0
+        for name in names:
+            if name.endswith('.json'):
+                try:
+                    os.remove(os.path.join(cache_dir, name))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    @staticmethod
+    def _solution_meta(finding: Finding) -> Dict[str, Any]:
+        """Get the finding details echoed back in its solution"""
+        return {
+            'language': finding.language,
+            'original_code': finding.code,
+            'line_number': finding.line,
+            'file_path': finding.file,
+        }
+
+    @staticmethod
+    def _dedup_key(finding: Finding) -> Tuple[str, str, str]:
+        """Get the key under which identical findings share one fix request"""
+        # Only whitespace is normalized: the fix is applied verbatim, so
+        # snippets with different identifiers need their own answers
+        return finding.issue, finding.language, ' '.join(finding.code.split())
+
+    def _prepare_fix_request(self, finding: Finding):
+        """Build the fix prompt and the metadata echoed back in the solution"""
+        meta = self._solution_meta(finding)
+        prompt = self._create_fix_prompt(
+            vulnerability_type=finding.issue,
+            cwe_id=finding.cwe,
+            language=finding.language,
+            problematic_code=finding.code,
+            description=finding.description,
+            context=finding.context,
+            line_number=finding.line
+        )
+        return prompt, meta
+
+    def _build_solution(self, solution_text: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a successful solution from the model response"""
+        return {
+            'success': True,
+            'solution_code': self._extract_solution_code(solution_text, meta['language']),
+            'explanation': solution_text,
+            **meta
+        }
+
+    def _unavailable_solution(self) -> Dict[str, Any]:
+        """Result returned when Gemini is not configured"""
+        return {
+            'success': False,
+            'error': 'Gemini API not available. Check GEMINI_API_KEY.',
+            'solution_code': '',
+            'explanation': ''
+        }
+
+    def _failed_solution(self, error: BaseException) -> Dict[str, Any]:
+        """Result returned when a Gemini request fails"""
+        return {
+            'success': False,
+            'error': str(error),
+            'solution_code': '',
+            'explanation': f'Failed to generate solution: {str(error)}'
+        }
+
+    def explain_vulnerability(self, issue_data: FindingInput) -> str:
         """
         Generate a detailed explanation of a vulnerability
 
         Args:
-            issue_data: Dictionary containing issue information
+            issue_data: Finding, or dictionary containing issue information
 
         Returns:
             Detailed explanation string
         """
+        finding = self._coerce(issue_data)
         if not self.is_available():
-            return self._get_fallback_explanation(issue_data)
-
-        vulnerability_type = issue_data.get('issue', 'Unknown')
-        cwe_id = issue_data.get('cwe', 'Unknown')
-        code = issue_data.get('code', '')
-        language = issue_data.get('language', 'unknown')
+            return self._get_fallback_explanation(finding)
 
         prompt = f"""You are a security expert. Explain this vulnerability in detail:
 
-Vulnerability Type: {vulnerability_type}
-CWE: {cwe_id}
-Language: {language}
-Code: {code}
+Vulnerability Type: {finding.issue}
+CWE: {finding.cwe}
+Language: {finding.language}
+Code: {finding.code}
 
 Provide:
 1. What this vulnerability is
@@ -159,8 +600,8 @@ Be concise but thorough."""
         try:
             response = self.model.generate_content(prompt)
             return response.text.strip()
-        except Exception as e:
-            return self._get_fallback_explanation(issue_data)
+        except Exception:
+            return self._get_fallback_explanation(finding)
 
     def _create_fix_prompt(self, vulnerability_type: str, cwe_id: str, language: str,
                            problematic_code: str, description: str, context: List[str],
@@ -213,51 +654,39 @@ Provide your response in this format:
     def _extract_solution_code(self, response: str, language: str) -> str:
         """Extract code block from AI response"""
         # Try to find code block with language tag
-        pattern = rf'```{language}\n(.*?)```'
-        match = re.search(pattern, response, re.DOTALL | re.IGNORECASE)
+        match = self._get_block_rx(language).search(response)
         if match:
             return match.group(1).strip()
 
         # Try generic code block
-        pattern = r'```\n?(.*?)```'
-        match = re.search(pattern, response, re.DOTALL)
+        match = _GENERIC_BLOCK_RX.search(response)
         if match:
             return match.group(1).strip()
 
         # Return everything after "Fixed Code" header if present
-        if '### Fixed Code' in response:
-            parts = response.split('### Fixed Code')
-            if len(parts) > 1:
-                code_section = parts[1].split('###')[0]
-                return code_section.strip().strip('`').strip()
+        match = _FIXED_CODE_RX.search(response)
+        if match:
+            return match.group(1).strip().strip('`').strip()
 
         return ''
 
+    @classmethod
+    def _get_block_rx(cls, language: str) -> re.Pattern:
+        """Get the compiled code block pattern for a language tag"""
+        rx = cls._CODE_BLOCK_CACHE.get(language)
+        if rx is None:
+            rx = re.compile(rf'```{re.escape(language)}\s*\n(.*?)```', re.DOTALL | re.IGNORECASE)
+            cls._CODE_BLOCK_CACHE[language] = rx
+        return rx
+
     def _detect_language(self, file_path: str) -> str:
         """Detect language from file extension"""
-        ext_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.jsx': 'javascript',
-            '.tsx': 'typescript',
-            '.java': 'java',
-            '.c': 'c',
-            '.cpp': 'cpp',
-            '.h': 'c',
-            '.hpp': 'cpp',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.rb': 'ruby',
-            '.php': 'php',
-        }
-        ext = os.path.splitext(file_path)[1].lower()
-        return ext_map.get(ext, 'unknown')
+        return resolve_language(file_path) or 'unknown'
 
-    def _get_fallback_explanation(self, issue_data: Dict[str, Any]) -> str:
+    def _get_fallback_explanation(self, finding: Finding) -> str:
         """Get fallback explanation when AI is not available"""
-        vulnerability_type = issue_data.get('issue', 'Unknown')
-        cwe_id = issue_data.get('cwe', 'Unknown')
+        vulnerability_type = finding.issue
+        cwe_id = finding.cwe
 
         explanations = {
             'sql-injection': 'SQL Injection allows attackers to manipulate database queries. Use parameterized queries instead of string concatenation.',
@@ -5,14 +5,49 @@ Uses Google Gemini 3 Pro for AI-powered code analysis and fixes.
 """
 
 import os
-from dotenv import load_dotenv
+import sys
+import functools
+from types import MappingProxyType
+
+
+@functools.lru_cache(maxsize=None)
+def load_environment() -> None:
+    """
+    Load environment variables from .env, once
+
+    Runs before the env-driven tables below are built, so BRIDGE_* settings
+    in .env take effect. Set BRIDGE_SKIP_DOTENV=1 to skip it entirely.
+    """
+    if os.environ.get('BRIDGE_SKIP_DOTENV') == '1':
+        return
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
 
-# Load environment variables
-load_dotenv()
 
 # Google Gemini Configuration (replacing Qwen3)
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', os.getenv('GOOGLE_API_KEY', ''))
-GEMINI_MODEL_NAME = os.getenv('GEMINI_MODEL_NAME', 'gemini-3-pro')
+def get_gemini_api_key() -> str:
+    """Get the Gemini API key from the environment"""
+    load_environment()
+    return os.getenv('GEMINI_API_KEY', os.getenv('GOOGLE_API_KEY', ''))
+
+
+def get_gemini_model_name() -> str:
+    """Get the Gemini model name from the environment"""
+    load_environment()
+    return os.getenv('GEMINI_MODEL_NAME', 'gemini-3-pro')
+
+
+def __getattr__(name):
+    # GEMINI_API_KEY / GEMINI_MODEL_NAME used to be module constants
+    if name == 'GEMINI_API_KEY':
+        return get_gemini_api_key()
+    if name == 'GEMINI_MODEL_NAME':
+        return get_gemini_model_name()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Gemini API endpoint
 GEMINI_API_BASE_URL = 'https://generativelanguage.googleapis.com/v1beta'
@@ -156,16 +191,75 @@ FILE_CONFIG = {
         'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml',
         'Cargo.lock', 'Gemfile.lock', 'poetry.lock',
         'mix.lock', 'go.sum'
+    ],
+    # Minified and bundled build output
+    'excluded_suffixes': [
+        '.min.js', '-min.js', '.bundle.js'
     ]
 }
 
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment, ignoring malformed values"""
+    value = os.getenv(name, '').strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"[config] Ignoring invalid {name}={value!r}, using {default}", file=sys.stderr)
+        return default
+
+
+# The tables below read BRIDGE_* settings, which may come from .env
+load_environment()
+
 # Scan configuration
 SCAN_CONFIG = {
     'parallel_processing': True,
     'max_workers': 4,
+    # Processes for the pattern scan; 0 means one per CPU
+    'scan_workers': max(_env_int('BRIDGE_SCAN_WORKERS', 0), 0),
+    # In a git checkout, skip files git ignores (ignored build output);
+    # tracked files and new, not yet committed ones are scanned
+    'respect_gitignore': True,
+    # Larger files are skipped (and reported); longer lines are only
+    # matched on their first max_line_length characters
+    'max_scan_file_size': 2 * 1024 * 1024,  # 2MB
+    'max_line_length': 4096,
     'timeout': 300,  # 5 minutes
     'memory_limit': 1024,  # MB
     'enable_ast_analysis': True,
     'enable_regex_analysis': True,
     'enable_semantic_analysis': False  # Requires additional setup
 }
+
+# Cache configuration (kept outside scanned repositories)
+CACHE_CONFIG = {
+    'enabled': os.getenv('BRIDGE_DISABLE_CACHE', '') != '1',
+    'cache_dir': os.getenv(
+        'BRIDGE_CACHE_DIR',
+        os.path.join(os.path.expanduser('~'), '.cache', 'bridge-console')
+    ),
+    # Per cache directory (scans, fixes): older or surplus entries are pruned
+    'max_age_days': max(_env_int('BRIDGE_CACHE_MAX_AGE_DAYS', 30), 0),
+    'max_entries': max(_env_int('BRIDGE_CACHE_MAX_ENTRIES', 500), 0),
+}
+
+
+def _freeze(value):
+    """Recursively convert dicts to read-only mappings and lists to tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+# Shared tables are read-only; callers that need to tweak one take a copy
+SECURITY_POLICIES = _freeze(SECURITY_POLICIES)
+CWE_CONFIG = _freeze(CWE_CONFIG)
+OWASP_CONFIG = _freeze(OWASP_CONFIG)
+FILE_CONFIG = _freeze(FILE_CONFIG)
+SCAN_CONFIG = _freeze(SCAN_CONFIG)
+CACHE_CONFIG = _freeze(CACHE_CONFIG)
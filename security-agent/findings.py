@@ -0,0 +1,78 @@
+"""
+Findings
+The security finding type shared by the scanner, detector and fixer
+"""
+
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional, Union
+
+from _lang_tables import resolve_language
+
+
+@dataclass(slots=True)
+class Finding:
+    """
+    A security finding as it moves through the scan pipeline
+
+    Slots keep each finding far smaller than the equivalent dict, and
+    to_dict() gives the JSON form. Every field has a default so callers
+    outside the scanner (e.g. the fixer) can build one from partial data.
+    """
+    file: str = 'Unknown'
+    line: int = 0
+    issue: str = 'Unknown'
+    severity: str = 'medium'
+    code: str = ''
+    exact_match: str = ''
+    description: str = ''
+    solution: str = ''
+    cwe: str = 'Unknown'
+    owasp: str = 'Unknown'
+    category: str = ''
+    context: List[str] = field(default_factory=list)
+    language: str = 'unknown'
+    # Set by pattern_detector.normalize_and_prioritize
+    priority_score: Optional[int] = None
+    priority: Optional[str] = None
+    # Set by pattern_detector.explain_and_suggest
+    explanation: Optional[str] = None
+    remediation: Optional[str] = None
+    references: Optional[List[str]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Finding':
+        """
+        Build a finding from its dict (JSON) form
+
+        Unknown keys are ignored and missing ones take their defaults; a
+        missing language is resolved from the file extension.
+
+        Args:
+            data: Finding dictionary, e.g. one entry of a scan result
+
+        Returns:
+            Finding
+        """
+        values = {
+            name: data[name] for name in _FINDING_FIELDS
+            if data.get(name) is not None
+        }
+        if 'context' in values:
+            values['context'] = list(values['context'])
+        if not values.get('language'):
+            values['language'] = resolve_language(values.get('file', '')) or 'unknown'
+        return cls(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dict in field order, leaving out fields not yet set"""
+        return {
+            name: value for name in _FINDING_FIELDS
+            if (value := getattr(self, name)) is not None
+        }
+
+
+# Field names in declaration order (the key order of to_dict)
+_FINDING_FIELDS = tuple(f.name for f in fields(Finding))
+
+# What APIs taking findings accept: a Finding, or its dict form
+FindingInput = Union[Finding, Dict[str, Any]]
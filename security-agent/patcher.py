@@ -6,10 +6,61 @@ Part of Bridge's autonomous code security system
 
 import os
 import re
+import stat
 import difflib
+import tempfile
+import functools
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+try:
+    from rapidfuzz import fuzz, process as fuzz_process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+
+# Context lines around each hunk in generated diffs
+DIFF_CONTEXT = 3
+
+# Minimum RapidFuzz token_set_ratio (0-100) for a fuzzy line match
+FUZZY_MATCH_CUTOFF = 85
+
+# Whitespace inside one line, used to match snippets whitespace-insensitively
+_INLINE_WS = r'[^\S\n]+'
+
+_HUNK_HEADER_RE = re.compile(r'^@@ -(\d+)((?:,\d+)?) \+(\d+)((?:,\d+)?) @@')
+
+
+def _shift_hunk_header(match: re.Match, offset: int) -> str:
+    """Move a hunk header's line numbers down by offset lines"""
+    old_start, old_len, new_start, new_len = match.groups()
+    return (f'@@ -{int(old_start) + offset}{old_len} '
+            f'+{int(new_start) + offset}{new_len} @@')
+
+
+@functools.lru_cache(maxsize=256)
+def _snippet_regex(normalized: str) -> re.Pattern:
+    """Compile a whitespace-normalized snippet to match any in-line whitespace"""
+    return re.compile(_INLINE_WS.join(map(re.escape, normalized.split(' '))))
+
+
+def _write_atomic(path: str, content: str) -> None:
+    """Replace a file's content via a temp file and os.replace, keeping its mode"""
+    # Resolve symlinks so the link itself is not replaced by a regular file
+    target = os.path.realpath(path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        if os.path.exists(target):
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(target).st_mode))
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 
 class SecurityPatcher:
     """Applies security fixes to source code files"""
@@ -24,6 +75,10 @@ class SecurityPatcher:
         self.repo_path = repo_path
         self.applied_patches: List[Dict[str, Any]] = []
         self.failed_patches: List[Dict[str, Any]] = []
+        self._relpaths: Dict[str, str] = {}
+        # Patched file contents (as lines) not yet written to disk
+        self._pending: Dict[str, List[str]] = {}
+        self._defer_writes = False
 
     def apply_fix(self, finding: Dict[str, Any], fix: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -38,7 +93,7 @@ class SecurityPatcher:
         """
         file_path = os.path.join(self.repo_path, finding['file'])
 
-        if not os.path.exists(file_path):
+        if file_path not in self._pending and not os.path.exists(file_path):
             return {
                 'success': False,
                 'error': f"File not found: {finding['file']}",
@@ -46,10 +101,11 @@ class SecurityPatcher:
             }
 
         try:
-            # Read the original file
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                original_content = f.read()
-                original_lines = original_content.split('\n')
+            # Read the file, or pick up earlier unwritten fixes to it
+            original_lines = self._pending.get(file_path)
+            if original_lines is None:
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    original_lines = f.read().split('\n')
 
             # Get the problematic code and the fix
             problematic_code = finding.get('code', '').strip()
@@ -70,16 +126,20 @@ class SecurityPatcher:
                     problematic_code, solution_code
                 )
                 if result['success']:
+                    if not self._defer_writes and file_path in self._pending:
+                        self._write_pending(file_path)
                     self.applied_patches.append(result)
                     return result
 
             # Strategy 2: Try to find and replace the exact code block
             result = self._apply_block_replacement(
-                file_path, original_content,
+                file_path, '\n'.join(original_lines),
                 problematic_code, solution_code, finding
             )
 
             if result['success']:
+                if not self._defer_writes and file_path in self._pending:
+                    self._write_pending(file_path)
                 self.applied_patches.append(result)
             else:
                 self.failed_patches.append(result)
@@ -96,6 +156,13 @@ class SecurityPatcher:
             self.failed_patches.append(error_result)
             return error_result
 
+    def _relpath(self, file_path: str) -> str:
+        """Path of file_path relative to the repo, computed once per file"""
+        relpath = self._relpaths.get(file_path)
+        if relpath is None:
+            relpath = self._relpaths[file_path] = os.path.relpath(file_path, self.repo_path)
+        return relpath
+
     def _apply_line_replacement(
         self, file_path: str, lines: List[str],
         line_number: int, old_code: str, new_code: str
@@ -115,22 +182,20 @@ class SecurityPatcher:
         indent = len(original_line) - len(original_line.lstrip())
         indented_fix = ' ' * indent + new_code.lstrip()
 
-        # Create the new content
-        new_lines = lines.copy()
-        new_lines[line_number - 1] = indented_fix
-        new_content = '\n'.join(new_lines)
-
-        # Write back
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+        # A fix identical to the current line leaves the file untouched
+        unchanged = indented_fix == original_line
+        if not unchanged:
+            # Edit the buffer in place; it is written back by _write_pending
+            lines[line_number - 1] = indented_fix
+            self._pending[file_path] = lines
 
         return {
             'success': True,
-            'file': os.path.relpath(file_path, self.repo_path),
+            'file': self._relpath(file_path),
             'line': line_number,
             'original': original_line.strip(),
             'replacement': new_code.strip(),
-            'strategy': 'line_replacement'
+            'strategy': 'noop' if unchanged else 'line_replacement'
         }
 
     def _apply_block_replacement(
@@ -141,50 +206,94 @@ class SecurityPatcher:
 
         # Try exact match first
         if old_code in content:
-            new_content = content.replace(old_code, new_code, 1)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            unchanged = new_code == old_code
+            if not unchanged:
+                new_content = content.replace(old_code, new_code, 1)
+                self._pending[file_path] = new_content.split('\n')
 
             return {
                 'success': True,
-                'file': os.path.relpath(file_path, self.repo_path),
+                'file': self._relpath(file_path),
                 'line': finding.get('line', 0),
                 'original': old_code[:100] + ('...' if len(old_code) > 100 else ''),
                 'replacement': new_code[:100] + ('...' if len(new_code) > 100 else ''),
-                'strategy': 'block_replacement'
+                'strategy': 'noop' if unchanged else 'block_replacement'
             }
 
-        # Try fuzzy matching (ignore whitespace differences)
-        normalized_old = ' '.join(old_code.split())
-
-        for line_num, line in enumerate(content.split('\n'), 1):
-            normalized_line = ' '.join(line.split())
-            if normalized_old in normalized_line or normalized_line in normalized_old:
-                # Found a match, replace this line
-                lines = content.split('\n')
-                indent = len(line) - len(line.lstrip())
-                lines[line_num - 1] = ' ' * indent + new_code.lstrip()
-                new_content = '\n'.join(lines)
-
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
+        # Try fuzzy matching
+        lines = content.split('\n')
+        match_index = self._find_fuzzy_line(content, lines, old_code)
+
+        if match_index is not None:
+            # Found a match, replace this line
+            line_num = match_index + 1
+            line = lines[match_index]
+            indent = len(line) - len(line.lstrip())
+            replacement = ' ' * indent + new_code.lstrip()
+            unchanged = replacement == line
+            if not unchanged:
+                lines[match_index] = replacement
+                self._pending[file_path] = lines
 
-                return {
-                    'success': True,
-                    'file': os.path.relpath(file_path, self.repo_path),
-                    'line': line_num,
-                    'original': line.strip()[:100],
-                    'replacement': new_code.strip()[:100],
-                    'strategy': 'fuzzy_replacement'
-                }
+            return {
+                'success': True,
+                'file': self._relpath(file_path),
+                'line': line_num,
+                'original': line.strip()[:100],
+                'replacement': new_code.strip()[:100],
+                'strategy': 'noop' if unchanged else 'fuzzy_replacement'
+            }
 
         return {
             'success': False,
             'error': 'Could not locate code to replace',
-            'file': os.path.relpath(file_path, self.repo_path),
+            'file': self._relpath(file_path),
             'finding': finding
         }
 
+    def _find_fuzzy_line(self, content: str, lines: List[str], old_code: str) -> Optional[int]:
+        """
+        Find the index of the line that best matches a code snippet
+
+        Whitespace-insensitive substring matching comes first. Only when no
+        line matches that way, and RapidFuzz is installed, is the line with
+        the closest whole-line similarity taken, which still catches
+        near-misses without letting short lines such as "}" win.
+
+        Args:
+            content: File content
+            lines: File content split into lines
+            old_code: The code snippet to locate
+
+        Returns:
+            0-based line index, or None if no line matches
+        """
+        normalized_old = ' '.join(old_code.split())
+
+        # A line containing the snippet is found with one regex search over
+        # the raw file (tokens separated by any run of in-line whitespace);
+        # only lines before it still need normalizing, to catch lines that
+        # are themselves a fragment of the snippet. Blank lines are never
+        # a fragment worth replacing.
+        hit = _snippet_regex(normalized_old).search(content)
+        stop = content.count('\n', 0, hit.start()) if hit else len(lines)
+
+        index = next(
+            (i for i in range(stop)
+             if (line := ' '.join(lines[i].split())) and line in normalized_old),
+            stop if hit else None
+        )
+        if index is not None or not RAPIDFUZZ_AVAILABLE:
+            return index
+
+        best = fuzz_process.extractOne(
+            normalized_old, lines,
+            scorer=fuzz.ratio,
+            processor=lambda line: ' '.join(line.split()),
+            score_cutoff=FUZZY_MATCH_CUTOFF
+        )
+        return best[2] if best is not None else None
+
     def apply_batch(
         self, findings: List[Dict[str, Any]],
         fixes: Dict[int, Dict[str, Any]]
@@ -207,34 +316,96 @@ class SecurityPatcher:
             'failure_count': 0
         }
 
-        for idx, fix in fixes.items():
-            if idx >= len(findings):
-                continue
+        # Buffer edits so each touched file is written once, at the end
+        self._defer_writes = True
+        try:
+            for idx, fix in fixes.items():
+                if idx >= len(findings):
+                    continue
 
-            finding = findings[idx]
-            result = self.apply_fix(finding, fix)
+                finding = findings[idx]
+                result = self.apply_fix(finding, fix)
 
-            if result['success']:
-                results['applied'].append(result)
-                results['success_count'] += 1
-            else:
-                results['failed'].append(result)
+                if result['success']:
+                    results['applied'].append(result)
+                    results['success_count'] += 1
+                else:
+                    results['failed'].append(result)
+                    results['failure_count'] += 1
+        finally:
+            self._defer_writes = False
+            write_errors = self.flush()
+
+        # Fixes to a file that could not be written did not land
+        for rel_file, error in write_errors.items():
+            for result in [r for r in results['applied'] if r.get('file') == rel_file]:
+                failed = {**result, 'success': False, 'error': error}
+                results['applied'].remove(result)
+                results['failed'].append(failed)
+                results['success_count'] -= 1
                 results['failure_count'] += 1
+                self.applied_patches.remove(result)
+                self.failed_patches.append(failed)
 
         return results
 
+    def flush(self) -> Dict[str, str]:
+        """
+        Write every buffered file back to disk, once per file
+
+        Returns:
+            Dictionary mapping the relative path of each file that could not
+            be written to the error message
+        """
+        errors = {}
+        for file_path in list(self._pending):
+            try:
+                self._write_pending(file_path)
+            except OSError as e:
+                errors[self._relpath(file_path)] = str(e)
+        return errors
+
+    def _write_pending(self, file_path: str) -> None:
+        """Write a file's buffered content back, dropping the buffer either way"""
+        lines = self._pending.pop(file_path)
+        _write_atomic(file_path, '\n'.join(lines))
+
     def generate_diff(self, original: str, modified: str) -> str:
         """Generate a unified diff between original and modified content"""
         original_lines = original.splitlines(keepends=True)
         modified_lines = modified.splitlines(keepends=True)
 
+        # Patches touch a few lines, so only hand difflib the changed window
+        # (plus context) instead of matching the whole file
+        prefix = 0
+        limit = min(len(original_lines), len(modified_lines))
+        while prefix < limit and original_lines[prefix] == modified_lines[prefix]:
+            prefix += 1
+        if prefix == len(original_lines) == len(modified_lines):
+            return ''
+
+        suffix = 0
+        limit -= prefix
+        while (suffix < limit and
+               original_lines[-1 - suffix] == modified_lines[-1 - suffix]):
+            suffix += 1
+
+        start = max(prefix - DIFF_CONTEXT, 0)
+        tail = max(suffix - DIFF_CONTEXT, 0)
         diff = difflib.unified_diff(
-            original_lines, modified_lines,
+            original_lines[start:len(original_lines) - tail],
+            modified_lines[start:len(modified_lines) - tail],
             fromfile='original', tofile='modified',
-            lineterm=''
+            lineterm='', n=DIFF_CONTEXT
         )
 
-        return ''.join(diff)
+        if not start:
+            return ''.join(diff)
+        return ''.join(
+            _HUNK_HEADER_RE.sub(lambda m: _shift_hunk_header(m, start), line)
+            if line.startswith('@@') else line
+            for line in diff
+        )
 
     def get_summary(self) -> Dict[str, Any]:
         """Get a summary of all patches applied"""
@@ -4,8 +4,15 @@ Detects insecure coding patterns using regex and pattern matching
 """
 
 import os
+import sys
 import re
-from typing import List, Dict, Any
+import operator
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Tuple
 from security_policies import (
     get_security_patterns,
     get_cwe_mapping,
@@ -13,90 +20,543 @@ from security_policies import (
     get_cwe_description,
     get_security_category,
 )
-from config import FILE_CONFIG
-
-
-def scan(repo_path: str, languages: List[str]) -> List[Dict[str, Any]]:
+from findings import Finding
+from config import SCAN_CONFIG
+from _lang_tables import git_unignored_files, iter_candidate_files, resolve_language
+
+# Optional native matching engines. There is deliberately no extension
+# module of our own: scan time is almost all inside C already (re searches
+# and bytes membership tests), and the Python loop in _scan_lines only runs
+# per whole-file hit, so a compiled driver would have nothing left to save.
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Bytes sniffed for a NUL when telling binary files from text (as git does)
+BINARY_SNIFF_SIZE = 8192
+
+# Priority boost for the most critical CWEs
+_CWE_BOOST = {
+    'CWE-94': 20, 'CWE-89': 20, 'CWE-78': 20,
+    'CWE-79': 10, 'CWE-22': 10, 'CWE-798': 10,
+}
+
+# Remediation advice per issue type
+_REMEDIATIONS = {
+    'sql-injection': 'Use parameterized queries or prepared statements instead of string concatenation.',
+    'command-injection': 'Use safe APIs that do not invoke shells, or properly escape/validate all inputs.',
+    'code-injection': 'Avoid using eval() or similar dynamic code execution. Use safe alternatives.',
+    'xss': 'Sanitize and encode all user input before rendering in HTML. Use Content Security Policy.',
+    'path-traversal': 'Validate and sanitize file paths. Use allowlists for permitted directories.',
+    'weak-crypto': 'Use modern, secure cryptographic algorithms (e.g., AES-256, SHA-256).',
+    'insecure-randomness': 'Use cryptographically secure random number generators.',
+    'hardcoded-secret': 'Move secrets to environment variables or a secrets management system.',
+    'tls-issues': 'Enable certificate verification and use TLS 1.2 or higher.',
+    'buffer-overflow': 'Use safe string functions (e.g., strncpy, snprintf) with proper bounds checking.',
+    'memory-leak': 'Ensure all allocated memory is properly freed. Consider using smart pointers.',
+    'insecure-deserialization': 'Avoid deserializing untrusted data. Use safe serialization formats.',
+    'ssrf': 'Validate and allowlist URLs. Do not pass user input directly to HTTP requests.',
+    'xxe': 'Disable external entity processing in XML parsers.',
+}
+
+# Line comment markers per language; lines starting with one are not scanned.
+# Each comment style is one shared tuple, checked with a single startswith
+# (faster than an anchored regex for a handful of short prefixes).
+_HASH_COMMENTS = ('#',)
+_C_STYLE_COMMENTS = ('//', '/*')
+_COMMENT_PREFIXES = {
+    'python': _HASH_COMMENTS,
+    'ruby': _HASH_COMMENTS,
+    'php': _HASH_COMMENTS + _C_STYLE_COMMENTS,
+    'javascript': _C_STYLE_COMMENTS,
+    'typescript': _C_STYLE_COMMENTS,
+    'java': _C_STYLE_COMMENTS,
+    'go': _C_STYLE_COMMENTS,
+    'rust': _C_STYLE_COMMENTS,
+    'c': _C_STYLE_COMMENTS,
+    'cpp': _C_STYLE_COMMENTS,
+}
+_DEFAULT_COMMENT_PREFIXES = _HASH_COMMENTS + ('//',)
+
+# Below this many files a process pool costs more to start than it saves
+PARALLEL_MIN_FILES = 64
+PARALLEL_CHUNK_SIZE = 16
+
+# Per-file scan errors listed in the end-of-scan summary
+MAX_REPORTED_ERRORS = 20
+
+# Only this much of a line is matched, bounding the cost of one huge line
+MAX_LINE_LENGTH = SCAN_CONFIG['max_line_length']
+
+# Hyperscan scratch space must not be shared between concurrent scans
+_hyperscan_local = threading.local()
+
+
+def scan(repo_path: str, languages: List[str],
+         skipped_files: Optional[List[str]] = None) -> List[Finding]:
     """
     Scan repository for security vulnerabilities
 
+    Files are collected with a serial walk, then scanned in a process pool
+    when SCAN_CONFIG['parallel_processing'] is set and there are enough of
+    them to repay the worker start-up. SCAN_CONFIG['scan_workers'] (env
+    BRIDGE_SCAN_WORKERS) sets the pool size, one process per CPU by default.
+    In a git checkout files git ignores are not scanned, so ignored build
+    output and vendored dependencies are skipped without being read; new
+    files that are not committed yet are still scanned. Files over
+    SCAN_CONFIG['max_scan_file_size'] are skipped too, and lines are matched
+    on their first SCAN_CONFIG['max_line_length'] characters.
+
     Args:
         repo_path: Path to the repository
         languages: List of languages to scan for
+        skipped_files: If given, filled with the relative paths of files
+            skipped for their size
 
     Returns:
         List of findings
     """
-    print(f"[pattern_detector] Scanning {repo_path} for {languages}")
+    print(f"[pattern_detector] Scanning {repo_path} for {languages}", file=sys.stderr)
     findings = []
 
-    excluded_dirs = set(FILE_CONFIG['excluded_dirs'])
-    excluded_files = set(FILE_CONFIG['excluded_files'])
-    max_file_size = FILE_CONFIG['max_file_size']
+    # Languages without security patterns have nothing to scan for
+    scan_languages = {lang for lang in languages if _compiled_patterns(lang)}
 
-    for root, dirs, files in os.walk(repo_path):
-        # Skip excluded directories
-        dirs[:] = [d for d in dirs if d not in excluded_dirs]
+    def is_scanned(name: str) -> bool:
+        return resolve_language(name) in scan_languages
 
-        for f in files:
-            # Skip excluded files
-            if f in excluded_files:
-                continue
+    root = repo_path.rstrip(os.sep) or repo_path
+    prefix_len = len(os.path.join(root, ''))
+    listed = git_unignored_files(root) if SCAN_CONFIG['respect_gitignore'] else None
+    max_size = SCAN_CONFIG['max_scan_file_size']
+    jobs = []
+    too_large = []
+    skipped = []
 
-            rel_path = os.path.relpath(os.path.join(root, f), repo_path)
-            file_path = os.path.join(root, f)
+    for entry in iter_candidate_files(root, name_filter=is_scanned, oversized=too_large):
+        # Empty files have nothing to find
+        size = entry.stat().st_size
+        if size == 0:
+            continue
+        rel_path = entry.path[prefix_len:]
+        if listed is not None and rel_path not in listed:
+            continue
+        if size > max_size:
+            skipped.append(rel_path)
+            continue
+        jobs.append((rel_path, entry.path, resolve_language(entry.name)))
+
+    # Files past the walker's own size limit never reach the loop above
+    skipped.extend(rel_path for rel_path in (path[prefix_len:] for path in too_large)
+                   if listed is None or rel_path in listed)
+    if skipped:
+        skipped.sort()
+        print(f"[pattern_detector] Skipped {len(skipped)} files over {max_size} bytes", file=sys.stderr)
+        if skipped_files is not None:
+            skipped_files.extend(skipped)
+
+    # Unreadable files are reported together instead of one line each
+    errors = []
+    for file_findings, error in _run_scan_jobs(jobs, languages):
+        findings.extend(file_findings)
+        if error is not None:
+            errors.append(error)
+
+    if errors:
+        shown = '; '.join(errors[:MAX_REPORTED_ERRORS])
+        more = len(errors) - MAX_REPORTED_ERRORS
+        print(f"[pattern_detector] Could not scan {len(errors)} files: {shown}"
+              + (f" (and {more} more)" if more > 0 else ''), file=sys.stderr)
+
+    print(f"[pattern_detector] Found {len(findings)} potential vulnerabilities", file=sys.stderr)
+    return findings
 
-            # Skip non-source files
-            if not any(f.endswith(ext) for ext in FILE_CONFIG['supported_extensions']):
-                continue
 
-            # Skip large files
-            try:
-                if os.path.getsize(file_path) > max_file_size:
-                    continue
-            except OSError:
-                continue
+def _run_scan_jobs(jobs: List[Tuple[str, str, str]], languages: List[str]):
+    """Scan (rel_path, file_path, language) jobs, in a process pool if worthwhile"""
+    workers = SCAN_CONFIG['scan_workers'] or os.cpu_count() or 1
+    # No more processes than there are chunks to hand out
+    workers = min(workers, -(-len(jobs) // PARALLEL_CHUNK_SIZE))
+    if SCAN_CONFIG['parallel_processing'] and workers > 1 and len(jobs) >= PARALLEL_MIN_FILES:
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=_pool_context(),
+                                     initializer=_warm_patterns,
+                                     initargs=(tuple(languages),)) as executor:
+                return list(executor.map(_scan_one, jobs, chunksize=PARALLEL_CHUNK_SIZE))
+        except (OSError, BrokenProcessPool) as e:
+            # e.g. no /dev/shm for the pool's semaphores
+            print(f"[pattern_detector] Process pool unavailable, scanning serially: {e}", file=sys.stderr)
+
+    return [_scan_one(job) for job in jobs]
+
+
+def _pool_context():
+    """Get a multiprocessing context that doesn't fork the calling process"""
+    # Scans run alongside other threads (progress emitter, clone cleanup,
+    # sniffing pools); forking while they hold a lock can deadlock the
+    # child, so workers are forked from a single-threaded server instead
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def _warm_patterns(languages: Tuple[str, ...]):
+    """Process pool initializer: compile each language's patterns once per worker"""
+    for language in languages:
+        _compiled_patterns(language)
+        _whole_file_lookup(language)
+        _file_prefilter(language)
+
+
+def _scan_one(job: Tuple[str, str, str]) -> Tuple[List[Finding], Optional[str]]:
+    """Read and scan one file, returning (findings, error message or None)"""
+    rel_path, file_path, language = job
+    try:
+        # Scanned files are capped at SCAN_CONFIG['max_scan_file_size'], so
+        # one read() is cheaper than mapping them
+        with open(file_path, 'rb') as file:
+            content = file.read()
+        return scan_bytes(rel_path, content, language), None
+    except Exception as e:
+        return [], f"{rel_path}: {e}"
+
+
+@functools.lru_cache(maxsize=32)
+def _compiled_patterns(language: str) -> Tuple[Tuple[re.Pattern, str, str], ...]:
+    """
+    Get a language's compiled security patterns (a tuple shared with security_policies)
+
+    Patterns stay separate searches rather than one fused alternation
+    (named groups read back through lastgroup): re still tries every branch
+    at every position and loses each pattern's literal prefix scan, so the
+    alternation gave no speedup on source lines and was 4-5x slower than
+    the literal-gated per-pattern searches as a whole-file prefilter.
+    finditer over it would also report only the first pattern to match at
+    a position, dropping overlapping findings, and fusing renumbers the
+    groups that backreferences such as C's double-free check rely on.
+    The single-pass multi-pattern job is left to Hyperscan/RE2, see
+    _file_prefilter.
+    """
+    return get_security_patterns(language)
+
+
+def _build_hyperscan_db(expressions: List[str]):
+    """Compile patterns into one Hyperscan database reporting each pattern once"""
+    flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_SINGLEMATCH
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[e.encode() for e in expressions],
+        ids=list(range(len(expressions))),
+        elements=len(expressions),
+        flags=[flags] * len(expressions),
+    )
+    return db
+
+
+_REGEX_META = frozenset('.^$*+?{}[]()|')
+_OPTIONAL_QUANTIFIERS = frozenset('*?{')
+
+
+def _required_literal(pattern: str) -> Optional[str]:
+    """
+    Find a literal substring every match of a pattern must contain
+
+    Conservative: only top-level literal runs count, a character followed by
+    an optional quantifier is dropped, and any alternation gives up.
+
+    Returns:
+        The longest such literal, lowercased, or None
+    """
+    runs = ['']
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        literal = None
+        if c == '\\':
+            escaped = pattern[i + 1:i + 2]
+            # Class escapes, anchors and backreferences (\1) just end a run
+            if escaped and not escaped.isalnum():
+                literal = escaped
+            i += 2
+        elif c == '[':
+            # Skip the character class, which may open with ']' or '^]'
+            i += 1
+            if pattern[i:i + 1] == '^':
+                i += 1
+            if pattern[i:i + 1] == ']':
+                i += 1
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            i += 1
+        elif c == '|':
+            return None
+        else:
+            if c == '(':
+                depth += 1
+            elif c == ')':
+                depth -= 1
+            elif c not in _REGEX_META:
+                literal = c
+            i += 1
+
+        optional = pattern[i:i + 1] in _OPTIONAL_QUANTIFIERS
+        if literal is not None and depth == 0 and not optional:
+            runs[-1] += literal
+        elif runs[-1]:
+            runs.append('')
+        if pattern[i:i + 1] == '+' and runs[-1]:
+            runs.append('')
+
+    longest = max(runs, key=len)
+    return longest.lower() if longest else None
+
+
+@functools.lru_cache(maxsize=64)
+def _required_literals(language: str, as_bytes: bool) -> Tuple[Optional[Any], ...]:
+    """Get each pattern's required literal (see _required_literal), as str or bytes"""
+    literals = [_required_literal(p[0].pattern) for p in _compiled_patterns(language)]
+    if as_bytes:
+        return tuple(lit.encode() if lit else None for lit in literals)
+    return tuple(literals)
+
+
+@functools.lru_cache(maxsize=32)
+def _literal_automaton(language: str):
+    """Build an Aho-Corasick automaton over a language's required literals"""
+    automaton = ahocorasick.Automaton()
+    for literal in _required_literals(language, False):
+        if literal:
+            automaton.add_word(literal, literal)
+    automaton.make_automaton()
+    return automaton
+
+
+def _present_literals(language: str, lowered) -> set:
+    """Get the required literals that occur in lowercased ASCII content"""
+    as_bytes = not isinstance(lowered, str)
+    literals = _required_literals(language, as_bytes)
+    if AHOCORASICK_AVAILABLE:
+        text = lowered.decode('ascii') if as_bytes else lowered
+        found = {literal for _, literal in _literal_automaton(language).iter(text)}
+        return {lit.encode() for lit in found} if as_bytes else found
+    return {lit for lit in set(literals) if lit and lit in lowered}
+
+
+@functools.lru_cache(maxsize=64)
+def _whole_file_patterns(language: str, as_bytes: bool) -> Tuple[re.Pattern, ...]:
+    """Get a language's patterns compiled for searching a whole file at once"""
+    flags = re.IGNORECASE | re.MULTILINE
+    return tuple(
+        re.compile(p[0].pattern.encode() if as_bytes else p[0].pattern, flags)
+        for p in _compiled_patterns(language)
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _whole_file_lookup(language: str) -> Dict[re.Pattern, re.Pattern]:
+    """Map each of a language's line patterns to its whole-file str form"""
+    return dict(zip((p[0] for p in _compiled_patterns(language)),
+                    _whole_file_patterns(language, False)))
+
+
+@functools.lru_cache(maxsize=32)
+def _file_prefilter(language: str):
+    """
+    Build a whole-file matcher that reports which of a language's patterns hit
 
+    Prefers Hyperscan, then an RE2 set, matching every pattern in one pass
+    over the file. Patterns the engine rejects (e.g. backreferences) are
+    searched with the stdlib re module, in multiline mode so anchors still
+    apply per line. A pattern that matches some line always matches the
+    whole file, so this only ever narrows the per-line work.
+
+    Returns:
+        Tuple of (engine kind, engine, engine index -> pattern index,
+        pattern indices searched with re)
+    """
+    sources = [p[0].pattern for p in _compiled_patterns(language)]
+    all_ids = list(range(len(sources)))
+
+    if HYPERSCAN_AVAILABLE and all_ids:
+        # Usually every pattern compiles, so try the whole set first and only
+        # probe patterns one by one (to find the rejected ones) if it fails
+        try:
+            return 'hyperscan', _build_hyperscan_db(sources), all_ids, []
+        except Exception:
+            pass
+        supported = []
+        for i in all_ids:
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                    content = file.read()
-                    lines = content.split('\n')
-
-                    # Detect vulnerabilities based on file type
-                    if f.endswith('.py') and 'python' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'python'))
-                    elif f.endswith('.js') and 'javascript' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'javascript'))
-                    elif f.endswith('.ts') and 'typescript' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'typescript'))
-                    elif f.endswith('.jsx') and 'javascript' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'javascript'))
-                    elif f.endswith('.tsx') and 'typescript' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'typescript'))
-                    elif f.endswith('.java') and 'java' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'java'))
-                    elif f.endswith('.php') and 'php' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'php'))
-                    elif f.endswith('.rb') and 'ruby' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'ruby'))
-                    elif f.endswith('.go') and 'go' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'go'))
-                    elif f.endswith('.rs') and 'rust' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'rust'))
-                    elif f.endswith(('.c', '.h')) and 'c' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'c'))
-                    elif f.endswith(('.cpp', '.cc', '.cxx', '.hpp')) and 'cpp' in languages:
-                        findings.extend(scan_file(rel_path, lines, 'cpp'))
-
-            except Exception as e:
-                print(f"[pattern_detector] Error scanning {rel_path}: {e}")
-                continue
-
-    print(f"[pattern_detector] Found {len(findings)} potential vulnerabilities")
-    return findings
+                _build_hyperscan_db([sources[i]])
+                supported.append(i)
+            except Exception:
+                pass
+        if supported:
+            db = _build_hyperscan_db([sources[i] for i in supported])
+            fallback = [i for i in all_ids if i not in supported]
+            return 'hyperscan', db, supported, fallback
+
+    if RE2_AVAILABLE and all_ids:
+        re2_set = re2.Set.SearchSet()
+        re2_ids = []
+        fallback = []
+        for i in all_ids:
+            try:
+                re2_set.Add('(?im)' + sources[i])
+                re2_ids.append(i)
+            except Exception:
+                fallback.append(i)
+        if re2_ids:
+            re2_set.Compile()
+            return 're2', re2_set, re2_ids, fallback
+
+    return None, None, None, all_ids
+
+
+# Non-ASCII characters that match an ASCII letter under re.IGNORECASE
+# (dotted/dotless i, long s, Kelvin sign)
+_ASCII_FOLDING_CHARS = ('\u0130', '\u0131', '\u017f', '\u212a')
+
+
+def _on_hyperscan_match(pattern_id, start, end, flags, context):
+    """Hyperscan match callback: record the pattern id"""
+    context.add(pattern_id)
 
 
-def scan_file(file_path: str, lines: List[str], language: str) -> List[Dict[str, Any]]:
+def _candidate_patterns(language: str, data) -> Tuple[Tuple[re.Pattern, str, str], ...]:
+    """
+    Get the patterns that match somewhere in a file, in table order
+
+    Args:
+        language: Programming language
+        data: File content as str, or as ASCII-only bytes
+    """
+    security_patterns = _compiled_patterns(language)
+    as_bytes = not isinstance(data, str)
+
+    if not as_bytes and not data.isascii():
+        # Byte-oriented engines don't share re's Unicode classes and case
+        # folding, so non-ASCII text is checked with re alone. The literal
+        # screen still holds unless the text has a character that re's case
+        # folding maps onto an ASCII letter.
+        whole_file = _whole_file_patterns(language, False)
+        if any(ch in data for ch in _ASCII_FOLDING_CHARS):
+            return tuple(p for p, rx in zip(security_patterns, whole_file) if rx.search(data))
+        literals = _required_literals(language, False)
+        present = _present_literals(language, data.lower())
+        return tuple(
+            p for p, rx, literal in zip(security_patterns, whole_file, literals)
+            if (literal is None or literal in present) and rx.search(data)
+        )
+
+    kind, engine, engine_ids, fallback = _file_prefilter(language)
+    matched = set()
+    if kind is not None:
+        buffer = bytes(data) if as_bytes else data.encode('ascii')
+        if kind == 'hyperscan':
+            scratch = getattr(_hyperscan_local, language, None)
+            if scratch is None:
+                scratch = hyperscan.Scratch(engine)
+                setattr(_hyperscan_local, language, scratch)
+            hits = set()
+            engine.scan(buffer, match_event_handler=_on_hyperscan_match,
+                        context=hits, scratch=scratch)
+            matched.update(engine_ids[i] for i in hits)
+        else:
+            matched.update(engine_ids[i] for i in engine.Match(buffer))
+
+    # The content is ASCII here, so a pattern whose required literal is
+    # absent from the lowercased text cannot match and needn't be searched
+    whole_file = _whole_file_patterns(language, as_bytes)
+    literals = _required_literals(language, as_bytes)
+    lowered = bytes(data).lower() if as_bytes else data.lower()
+    present = _present_literals(language, lowered)
+    for i in fallback:
+        literal = literals[i]
+        if literal is None:
+            if whole_file[i].search(data):
+                matched.add(i)
+        elif literal in present and _search_literal_lines(whole_file[i], data, lowered, literal):
+            matched.add(i)
+    return tuple(security_patterns[i] for i in sorted(matched))
+
+
+def _search_literal_lines(rx: re.Pattern, data, lowered, literal) -> bool:
+    """
+    Check whether a whole-file pattern matches within a line holding its literal
+
+    find() on the lowercased ASCII text skips straight to those lines, which
+    is several times faster than letting the regex walk the whole file. Any
+    line-level match contains the literal, so none is missed.
+    """
+    newline = b'\n' if isinstance(data, bytes) else '\n'
+    pos = 0
+    while True:
+        hit = lowered.find(literal, pos)
+        if hit < 0:
+            return False
+        start = data.rfind(newline, 0, hit) + 1
+        end = data.find(newline, hit)
+        if end < 0:
+            end = len(data)
+        if rx.search(data, start, min(end, start + MAX_LINE_LENGTH)):
+            return True
+        pos = end + 1
+
+
+def scan_bytes(file_path: str, data: bytes, language: str) -> List[Finding]:
+    """
+    Scan raw file content for security vulnerabilities
+
+    Content is only decoded and split into lines when some pattern matches
+    it, so clean files (the common case) are never turned into strings.
+
+    Args:
+        file_path: Relative path to file
+        data: File content as bytes
+        language: Programming language
+
+    Returns:
+        List of findings
+    """
+    # A NUL early on means a binary file that merely has a source extension
+    if b'\0' in data[:BINARY_SNIFF_SIZE]:
+        return []
+
+    # Non-ASCII and CR rule out the bytes fast path (text mode reads
+    # translate \r\n and lone \r into line breaks). bytes.isascii() and
+    # find() are word-at-a-time C loops, far faster than a regex class scan
+    if not data.isascii() or b'\r' in data:
+        content = data.decode('utf-8', errors='ignore')
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return scan_file(file_path, content.split('\n'), language, content)
+
+    security_patterns = _candidate_patterns(language, data)
+    if not security_patterns:
+        return []
+
+    content = data.decode('ascii')
+    return _scan_lines(file_path, content.split('\n'), language, security_patterns, content)
+
+
+def scan_file(file_path: str, lines: List[str], language: str,
+              content: Optional[str] = None) -> List[Finding]:
     """
     Scan a single file for security vulnerabilities
 
@@ -104,41 +564,101 @@ def scan_file(file_path: str, lines: List[str], language: str) -> List[Dict[str,
         file_path: Relative path to file
         lines: File content as list of lines
         language: Programming language
+        content: File content as one string, if the caller already has it
 
     Returns:
         List of findings
     """
+    if content is None:
+        content = '\n'.join(lines)
+
+    # Only patterns that hit somewhere in the file are tried line by line
+    security_patterns = _candidate_patterns(language, content)
+    if not security_patterns:
+        return []
+    return _scan_lines(file_path, lines, language, security_patterns, content)
+
+
+@functools.lru_cache(maxsize=None)
+def _issue_meta(issue_type: str) -> Tuple[str, str, str, str, str]:
+    """Get the per-issue finding fields: (description, solution, cwe, owasp, category)"""
+    cwe_info = get_cwe_mapping(issue_type)
+    return (
+        f'{issue_type.replace("-", " ").title()} vulnerability detected',
+        f'Review and fix the {issue_type} vulnerability',
+        cwe_info['cwe'],
+        cwe_info['owasp'],
+        get_security_category(issue_type),
+    )
+
+
+def _scan_lines(file_path: str, lines: List[str], language: str,
+                security_patterns: Tuple[Tuple[re.Pattern, str, str], ...],
+                content: str) -> List[Finding]:
+    """Match the given patterns against each line and build findings"""
+    comment_prefixes = _COMMENT_PREFIXES.get(language, _DEFAULT_COMMENT_PREFIXES)
+    whole_file = _whole_file_lookup(language)
+
+    # Rather than trying every pattern on every line, each pattern's
+    # whole-file search jumps to the next line it can match; that line is
+    # then confirmed against the line alone. A line-level match is also a
+    # whole-file match, so no line is missed.
+    hits = []
+    for order, (pattern, issue_type, severity) in enumerate(security_patterns):
+        search = whole_file[pattern].search
+        pos = counted = line_index = 0
+        while True:
+            file_match = search(content, pos)
+            if file_match is None:
+                break
+            start = file_match.start()
+            line_index += content.count('\n', counted, start)
+            line = lines[line_index][:MAX_LINE_LENGTH]
+
+            # Skip empty lines and comments
+            if line and not line.isspace() and not line.lstrip().startswith(comment_prefixes):
+                match = pattern.search(line)
+                if match is not None:
+                    hits.append((line_index, order, match.group(0)))
+
+            pos = content.find('\n', start) + 1
+            if not pos:
+                break
+            counted = pos
+            line_index += 1
+
+    # Report in line order, then table order within a line
+    hits.sort()
     findings = []
-    security_patterns = get_security_patterns(language)
-
-    for line_num, line in enumerate(lines, 1):
-        # Skip empty lines and comments
-        stripped = line.strip()
-        if not stripped or stripped.startswith('#') or stripped.startswith('//'):
-            continue
-
-        for pattern, issue_type, severity in security_patterns:
-            if re.search(pattern, line, re.IGNORECASE):
-                match = re.search(pattern, line, re.IGNORECASE)
-                exact_match = match.group(0) if match else stripped
-
-                cwe_info = get_cwe_mapping(issue_type)
-
-                findings.append({
-                    'file': file_path,
-                    'line': line_num,
-                    'issue': issue_type,
-                    'severity': severity,
-                    'code': stripped,
-                    'exact_match': exact_match,
-                    'description': f'{issue_type.replace("-", " ").title()} vulnerability detected',
-                    'solution': f'Review and fix the {issue_type} vulnerability',
-                    'cwe': cwe_info['cwe'],
-                    'owasp': cwe_info['owasp'],
-                    'category': get_security_category(issue_type),
-                    'context': get_context_lines(lines, line_num),
-                    'language': language
-                })
+    context = None
+    context_line = -1
+
+    for line_index, order, exact_match in hits:
+        pattern, issue_type, severity = security_patterns[order]
+
+        # Built on the line's first finding and shared by the rest
+        if line_index != context_line:
+            context_line = line_index
+            stripped = lines[line_index][:MAX_LINE_LENGTH].strip()
+            context = get_context_lines(lines, line_index + 1)
+
+        description, solution, cwe, owasp, category = _issue_meta(issue_type)
+
+        findings.append(Finding(
+            file=file_path,
+            line=line_index + 1,
+            issue=issue_type,
+            severity=severity,
+            code=stripped,
+            exact_match=exact_match,
+            description=description,
+            solution=solution,
+            cwe=cwe,
+            owasp=owasp,
+            category=category,
+            context=context,
+            language=language,
+        ))
 
     return findings
 
@@ -158,15 +678,14 @@ def get_context_lines(lines: List[str], line_num: int, context_size: int = 3) ->
     start = max(0, line_num - context_size - 1)
     end = min(len(lines), line_num + context_size)
 
-    context = []
-    for i in range(start, end):
-        prefix = '>>>' if i == line_num - 1 else '   '
-        context.append(f'{prefix} {i + 1}: {lines[i]}')
-
-    return context
+    target = line_num - 1
+    return [
+        f'{">>>" if i == target else "   "} {i + 1}: {lines[i]}'
+        for i in range(start, end)
+    ]
 
 
-def normalize_and_prioritize(findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def normalize_and_prioritize(findings: List[Finding]) -> List[Finding]:
     """
     Normalize findings and calculate priority scores
 
@@ -176,22 +695,20 @@ def normalize_and_prioritize(findings: List[Dict[str, Any]]) -> List[Dict[str, A
     Returns:
         Prioritized findings sorted by priority score
     """
+    # The score depends only on (severity, cwe), and findings repeat a
+    # handful of those, so each pair is scored once
+    scores = {}
     for finding in findings:
-        # Calculate priority score
-        severity_weight = get_severity_weight(finding['severity'])
-
-        # Boost for critical CWEs
-        cwe_boost = 0
-        if finding['cwe'] in ['CWE-94', 'CWE-89', 'CWE-78']:
-            cwe_boost = 20
-        elif finding['cwe'] in ['CWE-79', 'CWE-22', 'CWE-798']:
-            cwe_boost = 10
-
-        finding['priority_score'] = severity_weight + cwe_boost
-        finding['priority'] = categorize_priority(finding['priority_score'])
+        key = (finding.severity, finding.cwe)
+        scored = scores.get(key)
+        if scored is None:
+            # Severity weight, boosted for critical CWEs
+            score = get_severity_weight(key[0]) + _CWE_BOOST.get(key[1], 0)
+            scored = scores[key] = (score, categorize_priority(score))
+        finding.priority_score, finding.priority = scored
 
-    # Sort by priority score (descending)
-    return sorted(findings, key=lambda x: x['priority_score'], reverse=True)
+    # Sort by the precomputed priority score (descending)
+    return sorted(findings, key=operator.attrgetter('priority_score'), reverse=True)
 
 
 def categorize_priority(score: int) -> str:
@@ -206,7 +723,7 @@ def categorize_priority(score: int) -> str:
         return 'low'
 
 
-def explain_and_suggest(prioritized: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def explain_and_suggest(prioritized: List[Finding]) -> List[Finding]:
     """
     Add detailed explanations and suggestions to findings
 
@@ -216,39 +733,27 @@ def explain_and_suggest(prioritized: List[Dict[str, Any]]) -> List[Dict[str, Any
     Returns:
         Findings with explanations
     """
-    explanations = []
+    # Findings repeat a handful of (cwe, issue, language) combinations, so
+    # the explanation fields are built once per combination and shared
+    shared_fields = {}
 
     for finding in prioritized:
-        explanation = {
-            **finding,
-            'explanation': get_cwe_description(finding['cwe']),
-            'remediation': get_remediation_suggestion(finding['issue'], finding['language']),
-            'references': get_references(finding['cwe']),
-        }
-        explanations.append(explanation)
+        key = (finding.cwe, finding.issue, finding.language)
+        fields = shared_fields.get(key)
+        if fields is None:
+            fields = shared_fields[key] = (
+                get_cwe_description(finding.cwe),
+                get_remediation_suggestion(finding.issue, finding.language),
+                get_references(finding.cwe),
+            )
+        finding.explanation, finding.remediation, finding.references = fields
 
-    return explanations
+    return list(prioritized)
 
 
 def get_remediation_suggestion(issue_type: str, language: str) -> str:
     """Get remediation suggestion for an issue type"""
-    suggestions = {
-        'sql-injection': 'Use parameterized queries or prepared statements instead of string concatenation.',
-        'command-injection': 'Use safe APIs that do not invoke shells, or properly escape/validate all inputs.',
-        'code-injection': 'Avoid using eval() or similar dynamic code execution. Use safe alternatives.',
-        'xss': 'Sanitize and encode all user input before rendering in HTML. Use Content Security Policy.',
-        'path-traversal': 'Validate and sanitize file paths. Use allowlists for permitted directories.',
-        'weak-crypto': 'Use modern, secure cryptographic algorithms (e.g., AES-256, SHA-256).',
-        'insecure-randomness': 'Use cryptographically secure random number generators.',
-        'hardcoded-secret': 'Move secrets to environment variables or a secrets management system.',
-        'tls-issues': 'Enable certificate verification and use TLS 1.2 or higher.',
-        'buffer-overflow': 'Use safe string functions (e.g., strncpy, snprintf) with proper bounds checking.',
-        'memory-leak': 'Ensure all allocated memory is properly freed. Consider using smart pointers.',
-        'insecure-deserialization': 'Avoid deserializing untrusted data. Use safe serialization formats.',
-        'ssrf': 'Validate and allowlist URLs. Do not pass user input directly to HTTP requests.',
-        'xxe': 'Disable external entity processing in XML parsers.',
-    }
-    return suggestions.get(issue_type, f'Review and fix the {issue_type} vulnerability following security best practices.')
+    return _REMEDIATIONS.get(issue_type, f'Review and fix the {issue_type} vulnerability following security best practices.')
 
 
 def get_references(cwe: str) -> List[str]:
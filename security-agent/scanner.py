@@ -4,17 +4,191 @@ Main entry point for security scanning operations
 """
 
 import os
+import sys
 import json
+import atexit
+import queue
+import hashlib
+import functools
 import tempfile
 import shutil
+import threading
+from collections import Counter
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Tuple
 from git import Repo, InvalidGitRepositoryError
 
 import language_detector
 import pattern_detector
 from ai_fixer import AIFixer
-from config import SCAN_CONFIG
+from findings import Finding
+from config import CACHE_CONFIG, FILE_CONFIG, SCAN_CONFIG
+from _lang_tables import git_worktree_changes, iter_candidate_files
+from _cache_files import prune_cache_dir
+
+# A scan only reads the current tree: skip history, tags and other branches,
+# and fetch file contents only for the checked-out commit
+_SHALLOW_CLONE_OPTIONS = ['--depth=1', '--single-branch', '--no-tags', '--filter=blob:none']
+
+# Fail instead of waiting on a credential prompt nobody can answer
+_CLONE_ENV = {'GIT_TERMINAL_PROMPT': '0'}
+
+# Progress events buffered for a slow callback before the oldest are dropped
+PROGRESS_QUEUE_SIZE = 64
+
+# Findings below these severities don't justify a Gemini round-trip
+_FIXABLE_SEVERITIES = frozenset({'critical', 'high', 'medium'})
+
+# Background deletions of cloned repositories, finished before exit
+_pending_cleanups: List[threading.Thread] = []
+
+
+def _remove_tree_async(path: str) -> None:
+    """Delete a directory tree in a background thread"""
+    # The rename is instant and frees the path; the slow unlinks happen
+    # after the scan result has been returned
+    doomed = path + '.gone'
+    try:
+        os.rename(path, doomed)
+    except OSError:
+        doomed = path
+
+    _pending_cleanups[:] = [thread for thread in _pending_cleanups if thread.is_alive()]
+    thread = threading.Thread(target=shutil.rmtree, args=(doomed,),
+                              kwargs={'ignore_errors': True}, daemon=True)
+    thread.start()
+    _pending_cleanups.append(thread)
+
+
+@atexit.register
+def _wait_for_cleanups() -> None:
+    """Let pending deletions finish so no clone is left behind in temp"""
+    for thread in _pending_cleanups:
+        thread.join()
+
+
+# Modules whose code or tables shape a scan result; cached results are only
+# reused while all of them are unchanged
+_RESULT_SOURCES = (
+    'scanner.py', 'pattern_detector.py', 'security_policies.py', 'language_detector.py',
+    '_lang_tables.py', 'config.py', 'ai_fixer.py', 'findings.py',
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _results_digest() -> str:
+    """Hash the scanner sources and settings that determine scan results"""
+    digest = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in _RESULT_SOURCES:
+        with open(os.path.join(here, name), 'rb') as f:
+            digest.update(f.read())
+    digest.update(json.dumps([SCAN_CONFIG, FILE_CONFIG], default=dict, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _tree_fingerprint(repo_path: str) -> List[Any]:
+    """Describe a local tree so that any change to what a scan reads changes it"""
+    root = repo_path.rstrip(os.sep) or repo_path
+
+    # In a git checkout only files git doesn't ignore are scanned: HEAD
+    # pins the tracked ones and git status lists the few that differ from
+    # it or are new, so only those need a stat of their own
+    state = git_worktree_changes(root) if SCAN_CONFIG['respect_gitignore'] else None
+    if state is not None:
+        head, changes = state
+        return [os.path.abspath(root), head, [
+            (code, path, _stat_key(os.path.join(root, path))) for code, path in changes
+        ]]
+
+    # Otherwise every candidate file is described by its size and mtime
+    prefix_len = len(os.path.join(root, ''))
+    files = []
+    for entry in iter_candidate_files(root):
+        st = entry.stat()
+        files.append((entry.path[prefix_len:], st.st_size, st.st_mtime_ns))
+    files.sort()
+    return [os.path.abspath(root), files]
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+    """Get a file's (size, mtime), or None if it no longer exists"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _load_cached_result(cache_path: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Load a cached scan result, if any"""
+    if not cache_path:
+        return None
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_cached_result(cache_path: Optional[str], result: Dict[str, Any]) -> None:
+    """Atomically cache a scan result; failures are ignored"""
+    if not cache_path:
+        return
+    tmp_path = None
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError):
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        return
+    prune_cache_dir(cache_dir, CACHE_CONFIG['max_age_days'] * 86400, CACHE_CONFIG['max_entries'])
+
+
+class _ProgressEmitter:
+    """Deliver progress callbacks in order from a background thread"""
+
+    def __init__(self, callback: Callable, maxsize: int = PROGRESS_QUEUE_SIZE):
+        self._callback = callback
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __call__(self, step: str, progress: int, message: str) -> None:
+        """Queue a progress event without waiting for the callback"""
+        event = (step, progress, message)
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                # Later progress supersedes the oldest queued event
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def close(self) -> None:
+        """Wait for every queued event to be delivered, then stop the thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Emitter thread: call the callback for each event until closed"""
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            try:
+                self._callback(*event)
+            except Exception as e:
+                # A failing progress hook must not take the scan down with it
+                print(f"[scanner] Progress callback failed at '{event[0]}': {e}", file=sys.stderr)
 
 
 class SecurityScanner:
@@ -27,18 +201,33 @@ class SecurityScanner:
         Args:
             gemini_api_key: Optional Gemini API key for AI-powered fixes
         """
-        self.ai_fixer = AIFixer(api_key=gemini_api_key) if gemini_api_key else None
+        self._gemini_api_key = gemini_api_key
+
+    @functools.cached_property
+    def ai_fixer(self) -> Optional[AIFixer]:
+        """The AI fixer, set up with the Gemini client on first use (None without a key)"""
+        return AIFixer(api_key=self._gemini_api_key) if self._gemini_api_key else None
 
     def scan(self, repo_path_or_url: str,
              progress_callback: Optional[Callable] = None,
-             generate_fixes: bool = False) -> Dict[str, Any]:
+             generate_fixes: bool = False,
+             force: bool = False) -> Dict[str, Any]:
         """
         Scan a repository for security vulnerabilities
 
+        Successful results are cached in CACHE_CONFIG['cache_dir'], keyed by
+        the HEAD commit for cloned URLs and by git status (or file sizes and
+        mtimes outside git) for local paths, and reused until the tree or the
+        scanner changes. A reused result has 'cached' set and this run's
+        scan_date and duration. AI fixes are not part of the cached result;
+        they are requested again on every run (from the fixer's own cache
+        where it has them).
+
         Args:
             repo_path_or_url: Local path or Git URL
             progress_callback: Optional callback function(step, progress, message)
             generate_fixes: Whether to generate AI fixes for findings
+            force: Rescan even if a cached result exists (and refresh it)
 
         Returns:
             Dictionary with scan results
@@ -46,6 +235,11 @@ class SecurityScanner:
         start_time = datetime.now()
         temp_dir = None
 
+        # Progress is reported from a background thread so a slow callback
+        # (UI update, HTTP push) never stalls the scan itself
+        emitter = _ProgressEmitter(progress_callback) if progress_callback else None
+        progress_callback = emitter
+
         try:
             # Step 1: Resolve repository path
             if progress_callback:
@@ -59,18 +253,45 @@ class SecurityScanner:
                 if progress_callback:
                     progress_callback('clone', 15, 'Cloned repository...')
 
+            cache_path = self._result_cache_path(repo_path, repo_path_or_url, is_temp)
+            cached = None if force else _load_cached_result(cache_path)
+            if cached:
+                # The findings are reused; fixes and the run itself are this
+                # one's (the fixer's own cache makes repeated fixes cheap)
+                cached['fixes'] = self._generate_fixes(
+                    [Finding.from_dict(f) for f in cached['findings'][:10]],
+                    generate_fixes, progress_callback
+                )
+                cached['repo'] = repo_path_or_url
+                cached['scan_date'] = start_time.isoformat()
+                cached['duration_seconds'] = (datetime.now() - start_time).total_seconds()
+                cached['cached'] = True
+                if progress_callback:
+                    progress_callback('complete', 100, 'Scan complete (cached)!')
+                return cached
+
             # Step 2: Detect languages
             if progress_callback:
                 progress_callback('detect_langs', 25, 'Detecting languages...')
 
-            languages = language_detector.get_languages_in_repo(repo_path)
-            language_counts = language_detector.get_file_count_by_language(repo_path)
+            # One pass over the memoized file -> language map serves the
+            # language list, the per-language counts and the file count
+            lang_counter = Counter()
+            files_scanned = 0
+            for _, lang in language_detector.iter_file_languages(repo_path):
+                files_scanned += 1
+                if lang != 'unknown':
+                    lang_counter[lang] += 1
+            # Counter keeps first-seen order, as get_languages_in_repo does
+            language_counts = dict(lang_counter)
+            languages = list(language_counts)
 
             # Step 3: Scan for patterns
             if progress_callback:
                 progress_callback('scan', 40, 'Scanning for vulnerabilities...')
 
-            findings = pattern_detector.scan(repo_path, languages)
+            skipped_files = []
+            findings = pattern_detector.scan(repo_path, languages, skipped_files=skipped_files)
 
             # Step 4: Prioritize findings
             if progress_callback:
@@ -85,20 +306,14 @@ class SecurityScanner:
             explained = pattern_detector.explain_and_suggest(prioritized)
 
             # Step 6: Generate AI fixes if requested
-            fixes = []
-            if generate_fixes and self.ai_fixer and self.ai_fixer.is_available():
-                if progress_callback:
-                    progress_callback('fix', 85, 'Generating AI-powered fixes...')
-
-                # Only generate fixes for top priority issues
-                top_issues = explained[:10]  # Limit to top 10
-                fixes = self.ai_fixer.generate_batch_solutions(top_issues)
+            fixes = self._generate_fixes(explained, generate_fixes, progress_callback)
 
             # Step 7: Build summary
             if progress_callback:
                 progress_callback('summary', 95, 'Building summary...')
 
-            summary = self._build_summary(explained)
+            severity_counts, category_counts = self._count_findings(explained)
+            summary = self._build_summary(explained, severity_counts, category_counts)
 
             # Build result
             end_time = datetime.now()
@@ -109,21 +324,27 @@ class SecurityScanner:
                 'repo': repo_path_or_url,
                 'scan_date': start_time.isoformat(),
                 'duration_seconds': duration,
+                'cached': False,
                 'languages': languages,
                 'language_counts': language_counts,
-                'findings': explained,
+                'findings': [f.to_dict() for f in explained],
                 'fixes': fixes,
+                'skipped_files': skipped_files,
                 'summary': summary,
                 'stats': {
                     'total_findings': len(explained),
-                    'critical': sum(1 for f in explained if f.get('severity') == 'critical'),
-                    'high': sum(1 for f in explained if f.get('severity') == 'high'),
-                    'medium': sum(1 for f in explained if f.get('severity') == 'medium'),
-                    'low': sum(1 for f in explained if f.get('severity') == 'low'),
-                    'files_scanned': len(language_detector.detect_per_file(repo_path)),
+                    'critical': severity_counts.get('critical', 0),
+                    'high': severity_counts.get('high', 0),
+                    'medium': severity_counts.get('medium', 0),
+                    'low': severity_counts.get('low', 0),
+                    'files_scanned': files_scanned,
                 }
             }
 
+            # Fixes depend on the API's health at the time, not on the tree,
+            # so they are never cached with the scan
+            _save_cached_result(cache_path, {**result, 'fixes': []})
+
             if progress_callback:
                 progress_callback('complete', 100, 'Scan complete!')
 
@@ -138,12 +359,52 @@ class SecurityScanner:
             }
 
         finally:
-            # Clean up temp directory if we cloned
+            # Every progress event is delivered before the scan returns
+            if emitter:
+                emitter.close()
+
+            # Clean up temp directory if we cloned, without holding up the result
             if temp_dir and os.path.exists(temp_dir):
-                try:
-                    shutil.rmtree(temp_dir)
-                except Exception:
-                    pass
+                _remove_tree_async(temp_dir)
+
+    def _generate_fixes(self, findings: List[Finding], generate_fixes: bool,
+                        progress_callback: Optional[Callable]) -> List[Dict[str, Any]]:
+        """Generate AI fixes for the top priority findings, if requested and possible"""
+        if not (generate_fixes and self.ai_fixer and self.ai_fixer.is_available()):
+            return []
+
+        # Only generate fixes for top priority issues, skipping low
+        # severity ones and repeats of an issue already in the batch
+        worth_fixing = []
+        seen = set()
+        for f in findings[:10]:  # Limit to top 10
+            key = (f.issue, f.cwe, f.file)
+            if f.severity in _FIXABLE_SEVERITIES and key not in seen:
+                seen.add(key)
+                worth_fixing.append(f)
+
+        if not worth_fixing:
+            return []
+        if progress_callback:
+            progress_callback('fix', 85, 'Generating AI-powered fixes...')
+        return self.ai_fixer.generate_batch_solutions(worth_fixing)
+
+    def _result_cache_path(self, repo_path: str, repo_path_or_url: str,
+                           is_temp: bool) -> Optional[str]:
+        """Get the cache file for a scan of this exact tree, or None if uncacheable"""
+        if not CACHE_CONFIG['enabled']:
+            return None
+        try:
+            if is_temp:
+                # A fresh clone has fresh mtimes, but its commit pins the content
+                tree = [repo_path_or_url, Repo(repo_path).head.commit.hexsha]
+            else:
+                tree = _tree_fingerprint(repo_path)
+        except Exception:
+            return None
+
+        key = hashlib.sha256(json.dumps([_results_digest(), tree]).encode()).hexdigest()
+        return os.path.join(CACHE_CONFIG['cache_dir'], 'scans', f'{key}.json')
 
     def _resolve_repo_path(self, repo_path_or_url: str) -> str:
         """
@@ -163,7 +424,14 @@ class SecurityScanner:
         if repo_path_or_url.startswith(('http://', 'https://', 'git@', 'git://')):
             temp_dir = tempfile.mkdtemp(prefix='security_scan_')
             try:
-                Repo.clone_from(repo_path_or_url, temp_dir)
+                try:
+                    Repo.clone_from(repo_path_or_url, temp_dir,
+                                    multi_options=_SHALLOW_CLONE_OPTIONS, env=_CLONE_ENV)
+                except Exception:
+                    # Some servers reject shallow or partial clones; retry in full
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                    os.makedirs(temp_dir, exist_ok=True)
+                    Repo.clone_from(repo_path_or_url, temp_dir, env=_CLONE_ENV)
                 return temp_dir
             except Exception as e:
                 shutil.rmtree(temp_dir, ignore_errors=True)
@@ -175,8 +443,19 @@ class SecurityScanner:
 
         raise ValueError(f"Invalid repository path or URL: {repo_path_or_url}")
 
-    def _build_summary(self, findings: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Build executive summary of findings"""
+    def _count_findings(self, findings: List[Finding]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Count findings by severity and by category in a single pass"""
+        severity_counts = Counter()
+        category_counts = Counter()
+        for f in findings:
+            severity_counts[f.severity] += 1
+            category_counts[f.category] += 1
+        return dict(severity_counts), dict(category_counts)
+
+    def _build_summary(self, findings: List[Finding],
+                       severity_counts: Dict[str, int],
+                       category_counts: Dict[str, int]) -> Dict[str, Any]:
+        """Build executive summary of findings from their precomputed counts"""
         if not findings:
             return {
                 'status': 'clean',
@@ -185,18 +464,6 @@ class SecurityScanner:
                 'top_issues': [],
             }
 
-        # Count by severity
-        severity_counts = {}
-        for f in findings:
-            sev = f.get('severity', 'unknown')
-            severity_counts[sev] = severity_counts.get(sev, 0) + 1
-
-        # Count by category
-        category_counts = {}
-        for f in findings:
-            cat = f.get('category', 'unknown')
-            category_counts[cat] = category_counts.get(cat, 0) + 1
-
         # Determine risk level
         critical = severity_counts.get('critical', 0)
         high = severity_counts.get('high', 0)
@@ -217,11 +484,11 @@ class SecurityScanner:
         # Top issues
         top_issues = [
             {
-                'file': f['file'],
-                'line': f['line'],
-                'issue': f['issue'],
-                'severity': f['severity'],
-                'cwe': f['cwe'],
+                'file': f.file,
+                'line': f.line,
+                'issue': f.issue,
+                'severity': f.severity,
+                'cwe': f.cwe,
             }
             for f in findings[:5]
         ]
@@ -260,7 +527,8 @@ class SecurityScanner:
 def scan_repository(repo_path_or_url: str,
                     gemini_api_key: str = None,
                     progress_callback: Optional[Callable] = None,
-                    generate_fixes: bool = False) -> Dict[str, Any]:
+                    generate_fixes: bool = False,
+                    force: bool = False) -> Dict[str, Any]:
     """
     Convenience function to scan a repository
 
@@ -269,6 +537,7 @@ def scan_repository(repo_path_or_url: str,
         gemini_api_key: Optional Gemini API key
         progress_callback: Optional progress callback
         generate_fixes: Whether to generate AI fixes
+        force: Rescan even if a cached result exists
 
     Returns:
         Scan results dictionary
@@ -276,7 +545,8 @@ def scan_repository(repo_path_or_url: str,
     scanner = SecurityScanner(gemini_api_key=gemini_api_key)
     return scanner.scan(repo_path_or_url,
                         progress_callback=progress_callback,
-                        generate_fixes=generate_fixes)
+                        generate_fixes=generate_fixes,
+                        force=force)
 
 
 if __name__ == '__main__':
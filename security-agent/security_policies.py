@@ -3,6 +3,10 @@ Security Policies Configuration
 Centralized security policy definitions for vulnerability detection
 """
 
+import re
+import functools
+from types import MappingProxyType
+
 # CWE (Common Weakness Enumeration) mappings
 CWE_MAPPINGS = {
     'sql-injection': {'cwe': 'CWE-89', 'owasp': 'A03:2021 - Injection', 'severity': 'high'},
@@ -36,12 +40,70 @@ SEVERITY_WEIGHTS = {
     'info': 20
 }
 
-# Security patterns by language
-SECURITY_PATTERNS = {
+# Human-readable CWE descriptions
+CWE_DESCRIPTIONS = {
+    'CWE-89': 'SQL Injection - Improper neutralization of SQL commands',
+    'CWE-78': 'OS Command Injection - Improper neutralization of OS commands',
+    'CWE-79': 'Cross-site Scripting (XSS) - Improper neutralization of input during web page generation',
+    'CWE-22': 'Path Traversal - Improper limitation of a pathname to a restricted directory',
+    'CWE-94': 'Code Injection - Improper control of generation of code',
+    'CWE-327': 'Use of Broken or Risky Cryptographic Algorithm',
+    'CWE-330': 'Use of Insufficiently Random Values',
+    'CWE-295': 'Improper Certificate Validation',
+    'CWE-798': 'Use of Hard-coded Credentials',
+    'CWE-120': 'Buffer Copy without Checking Size of Input (Buffer Overflow)',
+    'CWE-401': 'Missing Release of Memory after Effective Lifetime (Memory Leak)',
+    'CWE-119': 'Improper Restriction of Operations within Bounds of a Memory Buffer',
+    'CWE-502': 'Deserialization of Untrusted Data',
+    'CWE-918': 'Server-Side Request Forgery (SSRF)',
+    'CWE-611': 'Improper Restriction of XML External Entity Reference (XXE)',
+    'CWE-362': 'Concurrent Execution using Shared Resource with Improper Synchronization (Race Condition)',
+    'CWE-269': 'Improper Privilege Management',
+    'CWE-90': 'LDAP Injection',
+    'CWE-943': 'Improper Neutralization of Special Elements in Data Query Logic (NoSQL Injection)',
+    'CWE-676': 'Use of Potentially Dangerous Function (Banned API)',
+}
+
+# Security category per issue type
+SECURITY_CATEGORIES = {
+    'sql-injection': 'Injection',
+    'nosql-injection': 'Injection',
+    'command-injection': 'Injection',
+    'ldap-injection': 'Injection',
+    'code-injection': 'Injection',
+    'xss': 'Cross-Site Scripting',
+    'path-traversal': 'Access Control',
+    'weak-crypto': 'Cryptography',
+    'insecure-randomness': 'Cryptography',
+    'tls-issues': 'Cryptography',
+    'hardcoded-secret': 'Secrets Management',
+    'buffer-overflow': 'Memory Safety',
+    'memory-leak': 'Memory Safety',
+    'unsafe-code': 'Code Safety',
+    'banned-api': 'Code Safety',
+    'insecure-deserialization': 'Data Integrity',
+    'ssrf': 'Network Security',
+    'xxe': 'XML Security',
+    'race-condition': 'Concurrency',
+    'privilege-escalation': 'Access Control',
+}
+
+# Hardcoded password check shared verbatim by several languages (JavaScript,
+# Go and PHP use their own assignment syntax). It is not applied to every
+# language: C and C++ have no secret checks, and adding one would change
+# their findings.
+_PASSWORD_LITERAL = (r'password\s*=\s*["\'][^"\']+["\']', 'hardcoded-secret', 'high')
+
+# Security patterns by language, as regex source strings.
+# Where two unbounded runs meet at a literal (quote .* % .* quote), the first
+# run excludes that literal: it then stops at the first candidate instead of
+# backtracking through every one, which keeps a failing match linear rather
+# than quadratic per start. Match spans are unchanged by the rewrite.
+_RAW_PATTERNS = {
     'python': [
         # SQL Injection
-        (r'execute\s*\(\s*["\'].*%.*["\']', 'sql-injection', 'high'),
-        (r'execute\s*\(\s*["\'].*\+.*["\']', 'sql-injection', 'high'),
+        (r'execute\s*\(\s*["\'][^%\n]*%.*["\']', 'sql-injection', 'high'),
+        (r'execute\s*\(\s*["\'][^+\n]*\+.*["\']', 'sql-injection', 'high'),
         (r'execute\s*\(\s*f["\']', 'sql-injection', 'high'),
         (r'cursor\.execute\s*\(\s*["\'].*%s', 'sql-injection', 'high'),
         (r'\.raw\s*\(\s*["\'].*%', 'sql-injection', 'high'),
@@ -56,7 +118,7 @@ SECURITY_PATTERNS = {
         # Code Injection
         (r'\beval\s*\(', 'code-injection', 'critical'),
         (r'\bexec\s*\(', 'code-injection', 'critical'),
-        (r'compile\s*\(.*,.*["\']exec["\']', 'code-injection', 'high'),
+        (r'compile\s*\([^,\n]*,.*["\']exec["\']', 'code-injection', 'high'),
 
         # Path Traversal
         (r'open\s*\(\s*[^,]+\+', 'path-traversal', 'high'),
@@ -73,7 +135,7 @@ SECURITY_PATTERNS = {
         (r'random\.randint\s*\(', 'insecure-randomness', 'medium'),
 
         # Hardcoded Secrets
-        (r'password\s*=\s*["\'][^"\']+["\']', 'hardcoded-secret', 'high'),
+        _PASSWORD_LITERAL,
         (r'api_key\s*=\s*["\'][^"\']+["\']', 'hardcoded-secret', 'high'),
         (r'secret\s*=\s*["\'][^"\']+["\']', 'hardcoded-secret', 'high'),
         (r'token\s*=\s*["\'][a-zA-Z0-9]{20,}["\']', 'hardcoded-secret', 'high'),
@@ -172,7 +234,7 @@ SECURITY_PATTERNS = {
         (r'MessageDigest\.getInstance\s*\(\s*["\']SHA-1', 'weak-crypto', 'medium'),
 
         # Hardcoded Secrets
-        (r'password\s*=\s*["\'][^"\']+["\']', 'hardcoded-secret', 'high'),
+        _PASSWORD_LITERAL,
         (r'apiKey\s*=\s*["\'][^"\']+["\']', 'hardcoded-secret', 'high'),
 
         # Insecure Deserialization
@@ -221,7 +283,7 @@ SECURITY_PATTERNS = {
         (r'unsafe\s*\{', 'unsafe-code', 'medium'),
 
         # Hardcoded Secrets
-        (r'password\s*=\s*["\'][^"\']+["\']', 'hardcoded-secret', 'high'),
+        _PASSWORD_LITERAL,
     ],
 
     'php': [
@@ -276,7 +338,7 @@ SECURITY_PATTERNS = {
         (r'File\.open\s*\(\s*[^)]*\+', 'path-traversal', 'high'),
 
         # Hardcoded Secrets
-        (r'password\s*=\s*["\'][^"\']+["\']', 'hardcoded-secret', 'high'),
+        _PASSWORD_LITERAL,
     ],
 
     'c': [
@@ -294,7 +356,7 @@ SECURITY_PATTERNS = {
 
         # Memory Issues
         (r'malloc\s*\([^)]+\)[^;]*;[^f]*$', 'memory-leak', 'medium'),
-        (r'free\s*\([^)]+\);.*free\s*\(\1\)', 'unsafe-code', 'high'),
+        (r'free\s*\(([^)]+)\);.*free\s*\(\1\)', 'unsafe-code', 'high'),
     ],
 
     'cpp': [
@@ -315,13 +377,29 @@ SECURITY_PATTERNS = {
 }
 
 
+@functools.lru_cache(maxsize=None)
+def _compile(pattern: str) -> re.Pattern:
+    """Compile a pattern (case-insensitively) once, however many languages list it"""
+    return re.compile(pattern, re.IGNORECASE)
+
+
+# Compiled once at import, so scanning never goes back through re.compile
+# or its cache; a pattern shared by several languages is one object. Each
+# language's entries are a read-only tuple that scanners use as is.
+_compiled_table = {
+    language: tuple((_compile(pattern), issue_type, severity)
+                    for pattern, issue_type, severity in patterns)
+    for language, patterns in _RAW_PATTERNS.items()
+}
+# TypeScript uses the JavaScript patterns (the same tuple)
+_compiled_table['typescript'] = _compiled_table['javascript']
+SECURITY_PATTERNS = MappingProxyType(_compiled_table)
+del _compiled_table
+
+
 def get_security_patterns(language):
-    """Get security patterns for a specific language"""
-    patterns = SECURITY_PATTERNS.get(language, [])
-    # For TypeScript, also use JavaScript patterns
-    if language == 'typescript':
-        patterns = SECURITY_PATTERNS.get('javascript', [])
-    return patterns
+    """Get the compiled (pattern, issue type, severity) entries for a language, as a tuple"""
+    return SECURITY_PATTERNS.get(language, ())
 
 
 def get_cwe_mapping(issue_type):
@@ -340,56 +418,12 @@ def get_severity_weight(severity):
 
 def get_cwe_description(cwe):
     """Get human-readable description for a CWE"""
-    descriptions = {
-        'CWE-89': 'SQL Injection - Improper neutralization of SQL commands',
-        'CWE-78': 'OS Command Injection - Improper neutralization of OS commands',
-        'CWE-79': 'Cross-site Scripting (XSS) - Improper neutralization of input during web page generation',
-        'CWE-22': 'Path Traversal - Improper limitation of a pathname to a restricted directory',
-        'CWE-94': 'Code Injection - Improper control of generation of code',
-        'CWE-327': 'Use of Broken or Risky Cryptographic Algorithm',
-        'CWE-330': 'Use of Insufficiently Random Values',
-        'CWE-295': 'Improper Certificate Validation',
-        'CWE-798': 'Use of Hard-coded Credentials',
-        'CWE-120': 'Buffer Copy without Checking Size of Input (Buffer Overflow)',
-        'CWE-401': 'Missing Release of Memory after Effective Lifetime (Memory Leak)',
-        'CWE-119': 'Improper Restriction of Operations within Bounds of a Memory Buffer',
-        'CWE-502': 'Deserialization of Untrusted Data',
-        'CWE-918': 'Server-Side Request Forgery (SSRF)',
-        'CWE-611': 'Improper Restriction of XML External Entity Reference (XXE)',
-        'CWE-362': 'Concurrent Execution using Shared Resource with Improper Synchronization (Race Condition)',
-        'CWE-269': 'Improper Privilege Management',
-        'CWE-90': 'LDAP Injection',
-        'CWE-943': 'Improper Neutralization of Special Elements in Data Query Logic (NoSQL Injection)',
-        'CWE-676': 'Use of Potentially Dangerous Function (Banned API)',
-    }
-    return descriptions.get(cwe, f'{cwe} - Security vulnerability')
+    return CWE_DESCRIPTIONS.get(cwe, f'{cwe} - Security vulnerability')
 
 
 def get_security_category(issue_type):
     """Get security category for an issue type"""
-    categories = {
-        'sql-injection': 'Injection',
-        'nosql-injection': 'Injection',
-        'command-injection': 'Injection',
-        'ldap-injection': 'Injection',
-        'code-injection': 'Injection',
-        'xss': 'Cross-Site Scripting',
-        'path-traversal': 'Access Control',
-        'weak-crypto': 'Cryptography',
-        'insecure-randomness': 'Cryptography',
-        'tls-issues': 'Cryptography',
-        'hardcoded-secret': 'Secrets Management',
-        'buffer-overflow': 'Memory Safety',
-        'memory-leak': 'Memory Safety',
-        'unsafe-code': 'Code Safety',
-        'banned-api': 'Code Safety',
-        'insecure-deserialization': 'Data Integrity',
-        'ssrf': 'Network Security',
-        'xxe': 'XML Security',
-        'race-condition': 'Concurrency',
-        'privilege-escalation': 'Access Control',
-    }
-    return categories.get(issue_type, 'General Security')
+    return SECURITY_CATEGORIES.get(issue_type, 'General Security')
 
 
 def get_banned_apis(language):